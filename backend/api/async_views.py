@@ -0,0 +1,71 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_VIEW_THREADS,
+                    thread_name_prefix='async-views'
+                )
+    return _executor
+
+
+def call_view(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def run_in_pool(view):
+    """Делает из синхронного представления асинхронное.
+
+    Представление и рендеринг ответа выполняются в ограниченном пуле
+    потоков, а цикл событий тем временем обслуживает медленных клиентов
+    и приём тел запросов.
+    """
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            get_executor(),
+            functools.partial(
+                contextvars.copy_context().run,
+                call_view, view, request, *args, **kwargs
+            )
+        )
+    return async_view
+
+
+def make_async(urlpatterns, names):
+    """Заменяет представления маршрутов с указанными именами на
+    асинхронные обёртки."""
+    return [
+        URLPattern(
+            pattern.pattern,
+            run_in_pool(pattern.callback),
+            pattern.default_args,
+            pattern.name
+        )
+        if isinstance(pattern, URLPattern) and pattern.name in names
+        else pattern
+        for pattern in urlpatterns
+    ]
@@ -0,0 +1,102 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from foodgram.caches import is_shared_cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+def get_token_key(key):
+    return 'auth:token:{}'.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+class LocalTokenCache:
+    """LRU токенов в памяти процесса с коротким временем жизни.
+
+    Токены хранятся сериализованными, чтобы каждый запрос получал
+    свой экземпляр пользователя. Сигналы сбрасывают записи только
+    в своём процессе, поэтому в остальных процессах изменения видны
+    не позже чем через ttl.
+    """
+
+    def __init__(self, ttl, size):
+        self.ttl = ttl
+        self.size = size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if time.monotonic() - item[0] >= self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return pickle.loads(item[1])
+
+    def set(self, key, token):
+        with self._lock:
+            self._items[key] = time.monotonic(), pickle.dumps(token)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+local_tokens = LocalTokenCache(
+    settings.AUTH_TOKEN_LOCAL_TTL, settings.AUTH_TOKEN_LOCAL_SIZE
+)
+
+
+def invalidate_token(key):
+    cache_key = get_token_key(key)
+    local_tokens.delete(cache_key)
+    caches[settings.AUTH_TOKEN_CACHE_ALIAS].delete(cache_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Токен-аутентификация без запроса к базе на каждый запрос.
+
+    Токен вместе с пользователем хранится в LRU процесса и в кэше
+    AUTH_TOKEN_CACHE_ALIAS; сигналы сбрасывают его при удалении токена
+    и сохранении пользователя. Если этот кэш в памяти процесса, отзыв
+    токена не дошёл бы до других воркеров, поэтому токен каждый раз
+    читается из базы.
+    """
+
+    def authenticate_credentials(self, key):
+        if not is_shared_cache(settings.AUTH_TOKEN_CACHE_ALIAS):
+            return super().authenticate_credentials(key)
+        cache_key = get_token_key(key)
+        token = local_tokens.get(cache_key)
+        if token is None:
+            cache = caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+            token = cache.get(cache_key)
+            if token is None:
+                model = self.get_model()
+                try:
+                    token = model.objects.select_related('user').get(key=key)
+                except model.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+                cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TTL)
+            local_tokens.set(cache_key, token)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return token.user, token
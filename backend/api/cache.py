@@ -0,0 +1,167 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import CharField, Value
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from django.utils.http import http_date
+from foodgram.routers import primary
+from recipes.models import Cart, Favourite, Follow
+from rest_framework.response import Response
+
+GENERATION_KEY = 'recipes:generation'
+
+
+def get_cache():
+    return caches[settings.RECIPES_CACHE_ALIAS]
+
+
+def get_generation():
+    """Текущее поколение данных рецептов (время последнего изменения)."""
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time(), None)
+        generation = cache.get(GENERATION_KEY, time.time())
+    return generation
+
+
+def bump_generation():
+    get_cache().set(GENERATION_KEY, time.time(), None)
+
+
+def get_response_key(request, generation):
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+    )
+    url = f'{request.get_host()}{request.path}?{query}'
+    return 'recipes:{}:{}'.format(
+        generation,
+        hashlib.md5(url.encode()).hexdigest()
+    )
+
+
+def get_user_flags_key(user_id):
+    return f'recipes:flags:{user_id}'
+
+
+def get_user_flags(user):
+    """Id избранных рецептов, рецептов в корзине и авторов в подписках."""
+    cache = get_cache()
+    key = get_user_flags_key(user.pk)
+    flags = cache.get(key)
+    if flags is None:
+        flags = {
+            'version': time.time(),
+            'favorites': set(),
+            'cart': set(),
+            'follows': set(),
+        }
+        rows = Favourite.objects.filter(user=user).values_list(
+            Value('favorites', output_field=CharField()), 'recipe'
+        ).union(
+            Cart.objects.filter(user=user).values_list(
+                Value('cart', output_field=CharField()), 'recipe'
+            ),
+            Follow.objects.filter(user=user).values_list(
+                Value('follows', output_field=CharField()), 'author'
+            ),
+            all=True
+        )
+        for name, pk in rows:
+            flags[name].add(pk)
+        cache.set(key, flags, settings.RECIPES_CACHE_TIMEOUT)
+    return flags
+
+
+def invalidate_user_flags(user_id):
+    get_cache().delete(get_user_flags_key(user_id))
+
+
+def overlay_user_flags(data, flags):
+    recipes = data['results'] if 'results' in data else [data]
+    for recipe in recipes:
+        recipe['is_favorited'] = recipe['id'] in flags['favorites']
+        recipe['is_in_shopping_cart'] = recipe['id'] in flags['cart']
+        recipe['author']['is_subscribed'] = (
+            recipe['author']['id'] in flags['follows']
+        )
+    return data
+
+
+class SharedCacheMixin:
+    """Кэширует list и retrieve в общем для всех пользователей виде.
+
+    Ключ строится по нормализованному адресу запроса и поколению данных,
+    которое сигналы сдвигают при изменении рецептов. Для авторизованных
+    пользователей поверх общего ответа проставляются личные флаги.
+    Ответы несут ETag и Last-Modified для условных запросов.
+    """
+    personal_filters = ('is_favorited', 'is_in_shopping_cart')
+    shared_payload = False
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def is_personal_request(self, request):
+        return request.user.is_authenticated and any(
+            request.query_params.get(name) in ('1', 'true', 'True')
+            for name in self.personal_filters
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if self.is_personal_request(request):
+            return handler(request, *args, **kwargs)
+        generation = get_generation()
+        key = get_response_key(request, generation)
+        etag = key
+        last_modified = generation
+        flags = None
+        if request.user.is_authenticated:
+            flags = get_user_flags(request.user)
+            etag = f'{key}:{request.user.pk}:{flags["version"]}'
+            last_modified = max(generation, flags['version'])
+        etag = quote_etag(hashlib.md5(etag.encode()).hexdigest())
+        last_modified = int(last_modified)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        cache = get_cache()
+        data = cache.get(key)
+        if data is None:
+            self.shared_payload = True
+            if time.time() - generation < settings.REPLICA_STICKY_SECONDS:
+                # Реплика могла ещё не получить последнее изменение,
+                # а ответ попадёт в кэш для всех
+                with primary():
+                    response = handler(request, *args, **kwargs)
+            else:
+                response = handler(request, *args, **kwargs)
+            self.shared_payload = False
+            if response.status_code != 200:
+                return response
+            data = response.data
+            cache.set(key, data, settings.RECIPES_CACHE_TIMEOUT)
+        if flags is not None:
+            data = overlay_user_flags(data, flags)
+        response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,66 @@
+import uuid
+
+from django.core.files.base import ContentFile
+from drf_extra_fields.fields import Base64ImageField
+from recipes.images import ImageError, decode_image, get_rendition_names
+from rest_framework import serializers
+
+
+class RecipeImageField(Base64ImageField):
+    """Картинка рецепта в base64.
+
+    Декодирует данные частями во временный файл, проверяет размеры
+    и перекодирует картинку в JPEG ограниченного размера.
+    """
+    default_error_messages = {
+        'too_large': 'Размер картинки не должен превышать {max_size} байт.',
+        'too_many_pixels': 'Картинка слишком большая.',
+    }
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        try:
+            content, source_digest = decode_image(base64_data)
+        except ImageError as error:
+            if error.code == 'invalid_type':
+                raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+            if error.code == 'invalid_file':
+                raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+            self.fail(error.code, **error.params)
+        image = serializers.FileField.to_internal_value(
+            self,
+            ContentFile(content, name=f'{uuid.uuid4()}.jpg')
+        )
+        # По нему сериализатор узнаёт повторно присланную картинку
+        image.source_digest = source_digest
+        return image
+
+
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """Ссылки на превью картинки рецепта во всех размерах и форматах.
+
+    Пока превью не построены, вместо них отдаётся ссылка на исходную
+    картинку.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        image = recipe.image
+        if not image:
+            return None
+        storage = image.storage
+        request = self.context.get('request')
+        renditions = get_rendition_names(image.name)
+        for formats in renditions.values():
+            for extension, name in formats.items():
+                url = storage.url(name if recipe.images_ready else image.name)
+                formats[extension] = (
+                    request.build_absolute_uri(url) if request else url
+                )
+        return renditions
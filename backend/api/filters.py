@@ -1,16 +1,14 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Exists, F, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import SEARCH_CONFIG, Recipe
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 
+from .reference import tag_registry
 
-class IngredientFilter(FilterSet):
-    name = filters.CharFilter(
-        field_name='name',
-        lookup_expr='istartswith'
-    )
 
-    class Meta:
-        model = Ingredient
-        fields = ('name',)
+def get_tag_choices():
+    return tag_registry.choices()
 
 
 class RecipeFilter(FilterSet):
@@ -20,16 +18,25 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_method'
     )
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all()
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags'
     )
 
     class Meta:
         model = Recipe
         fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
 
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.filter(Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'),
+                tag__in=tag_registry.get_ids(value)
+            )
+        ))
+
     def is_favorited_method(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
             queryset = queryset.filter(favorite__user=self.request.user)
@@ -39,3 +46,62 @@ class RecipeFilter(FilterSet):
         if value and self.request.user.is_authenticated:
             queryset = queryset.filter(cart__user=self.request.user)
         return queryset
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск с сортировкой по релевантности."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, '').strip()
+        if not search:
+            return queryset
+        query = SearchQuery(
+            search,
+            config=SEARCH_CONFIG,
+            search_type='websearch'
+        )
+        return queryset.annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).filter(
+            search_vector=query
+        ).order_by('-rank', *queryset.query.order_by)
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    """Сортировка рецептов, в том числе по рейтингам из RecipeScore.
+
+    popular и trending сортируют по убыванию предрассчитанного рейтинга,
+    -popular и -trending — по возрастанию.
+    """
+    score_orderings = {
+        'popular': ('popularity_score', 'score__popularity'),
+        'trending': ('trending_score', 'score__trending'),
+    }
+
+    def get_valid_fields(self, queryset, view, context={}):
+        return super().get_valid_fields(queryset, view, context) + [
+            (name, name) for name in self.score_orderings
+        ]
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        fields = []
+        for term in ordering:
+            name = term.lstrip('-')
+            if name not in self.score_orderings:
+                fields.append(term)
+                continue
+            # Строка RecipeScore есть у каждого рецепта, поэтому фильтр
+            # только делает соединение внутренним: так сортировку
+            # обслуживают индексы score_popularity_idx и score_trending_idx
+            alias, source = self.score_orderings[name]
+            queryset = queryset.filter(
+                **{f'{source}__isnull': False}
+            ).annotate(**{alias: F(source)})
+            descending = not term.startswith('-')
+            fields += [('-' if descending else '') + alias,
+                       '-pk' if descending else 'pk']
+        return queryset.order_by(*fields)
@@ -0,0 +1,9 @@
+from foodgram.metrics import serializer_timer
+
+
+class TimedSerializerMixin:
+    """Учитывает время to_representation в метриках запроса."""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
@@ -1,6 +1,177 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import b64decode, b64encode
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from recipes.feed import get_feed_keys
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPaginator(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+
+class CursorPaginator(BasePagination):
+    """Keyset-пагинация по паре (поле сортировки, id).
+
+    Не выполняет COUNT(*) и OFFSET: каждая страница выбирается условием
+    на значения последней записи предыдущей страницы.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = settings.MAX_PAGE_SIZE
+    default_ordering = 'pub_date'
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = [
+            field for field in queryset.query.order_by
+            if isinstance(field, str)
+        ]
+        field = ordering[0] if ordering else self.default_ordering
+        return field.lstrip('-'), field.startswith('-')
+
+    def get_cursor_field(self, queryset):
+        """Поле модели или аннотации, по которому строится курсор."""
+        annotation = queryset.query.annotations.get(self.field)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(self.field)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            value, pk, reverse = json.loads(b64decode(encoded.encode()))
+            value = self.get_cursor_field(queryset).to_python(value)
+            pk = queryset.model._meta.pk.to_python(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None or pk is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), bool(reverse)
+
+    def encode_cursor(self, instance, reverse):
+        value = getattr(instance, self.field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        encoded = b64encode(
+            json.dumps([value, instance.pk, reverse]).encode()
+        ).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.field, descending = self.get_ordering(queryset)
+        position, reverse = self.decode_cursor(request, queryset)
+        if reverse:
+            descending = not descending
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + self.field, prefix + 'pk')
+        if position is not None:
+            value, pk = position
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}e': value}),
+                Q(**{f'{self.field}__{lookup}': value})
+                | Q(**{f'pk__{lookup}': pk})
+            )
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return replace_query_param(
+                self.base_url, self.cursor_query_param, ''
+            )
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+
+class FeedPaginator(CursorPaginator):
+    """Keyset-пагинация ленты подписок только вперёд.
+
+    Ключи страницы берутся из get_feed_keys, затем рецепты загружаются
+    из переданной выборки одним запросом.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.field = 'pub_date'
+        position, _ = self.decode_cursor(request, queryset)
+        keys = get_feed_keys(request.user, self.page_size + 1, position)
+        self.has_next = len(keys) > self.page_size
+        self.has_previous = False
+        keys = keys[:self.page_size]
+        recipes = queryset.in_bulk([pk for _, pk in keys])
+        self.page = [recipes[pk] for _, pk in keys if pk in recipes]
+        return self.page
+
+
+class RecipePaginator(CustomPaginator):
+    """Постраничная пагинация, переходящая в keyset-режим по запросу.
+
+    Клиенты, передающие page, получают прежний ответ с count. Параметр
+    cursor (в том числе пустой для первой страницы) включает
+    CursorPaginator.
+    """
+    cursor_paginator_class = CursorPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_query_param = self.cursor_paginator_class.cursor_query_param
+        if (self.page_query_param not in request.query_params
+                and cursor_query_param in request.query_params):
+            self.cursor_paginator = self.cursor_paginator_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
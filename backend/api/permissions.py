@@ -14,6 +14,14 @@ class IsAdminOwnerOrReadOnly(permissions.BasePermission):
                 or request.user.is_authenticated)
 
 
+class IsAdmin(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_admin or request.user.is_superuser
+        )
+
+
 class DenyAny(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return False
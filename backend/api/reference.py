@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from foodgram.routers import primary
+from recipes.models import Ingredient, Tag
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class ReferenceCache:
+    """Справочник в памяти процесса.
+
+    Строится при первом обращении и сбрасывается сигналами сохранения
+    и удаления записей. Изменения, сделанные в других процессах,
+    подхватываются по истечении ttl секунд.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = None
+
+    def invalidate(self):
+        self._data = None
+
+    def _is_fresh(self, data):
+        return data is not None and (
+            not self.ttl or time.monotonic() - data[0] < self.ttl
+        )
+
+    def _get_data(self):
+        data = self._data
+        if self._is_fresh(data):
+            return data
+        with self._lock:
+            data = self._data
+            if not self._is_fresh(data):
+                with primary():
+                    data = self._build()
+                self._data = data
+        return data
+
+    def _build(self):
+        raise NotImplementedError
+
+
+class IngredientIndex(ReferenceCache):
+    """Префиксный индекс ингредиентов."""
+
+    def _build(self):
+        items = sorted(
+            (
+                {'id': pk, 'name': name, 'measurement_unit': unit}
+                for pk, name, unit in Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                ).order_by()
+            ),
+            key=lambda item: (item['name'].casefold(), item['id'])
+        )
+        keys = [item['name'].casefold() for item in items]
+        return time.monotonic(), keys, items
+
+    def all(self):
+        return self._get_data()[2]
+
+    def search(self, query, limit):
+        """Сначала совпадения по началу названия, затем по подстроке."""
+        _, keys, items = self._get_data()
+        query = query.casefold()
+        results = []
+        position = bisect_left(keys, query)
+        while (position < len(keys) and len(results) < limit
+               and keys[position].startswith(query)):
+            results.append(items[position])
+            position += 1
+        if len(results) < limit:
+            for key, item in zip(keys, items):
+                if query in key and not key.startswith(query):
+                    results.append(item)
+                    if len(results) == limit:
+                        break
+        return results
+
+
+class TagRegistry(ReferenceCache):
+    """Соответствие slug тэгов их id."""
+
+    def _build(self):
+        return time.monotonic(), dict(
+            Tag.objects.values_list('slug', 'id').order_by()
+        )
+
+    def choices(self):
+        return [(slug, slug) for slug in self._get_data()[1]]
+
+    def get_ids(self, slugs):
+        ids = self._get_data()[1]
+        return [ids[slug] for slug in slugs if slug in ids]
+
+
+class JsonBlob(ReferenceCache):
+    """Готовый JSON-ответ справочника, заранее сжатый gzip и brotli.
+
+    Каждый вариант кодирования получает свой строгий ETag, ответы можно
+    кэшировать в браузере и в nginx.
+    """
+    encodings = ('br', 'gzip')
+
+    def __init__(self, build_data, ttl=None):
+        super().__init__(ttl)
+        self.build_data = build_data
+
+    def _build(self):
+        content = JSONRenderer().render(self.build_data())
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        bodies = {'identity': content, 'gzip': gzip.compress(content)}
+        if brotli is not None:
+            bodies['br'] = brotli.compress(content)
+        etags = {
+            encoding: f'"{digest}"' if encoding == 'identity'
+            else f'"{digest}-{encoding}"'
+            for encoding in bodies
+        }
+        return time.monotonic(), bodies, etags
+
+    def get_encoding(self, request, bodies):
+        accepted = set()
+        for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+            coding, _, params = item.strip().partition(';')
+            if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+                accepted.add(coding.strip().lower())
+        for encoding in self.encodings:
+            if encoding in bodies and encoding in accepted:
+                return encoding
+        return 'identity'
+
+    def response(self, request):
+        _, bodies, etags = self._get_data()
+        encoding = self.get_encoding(request, bodies)
+        response = get_conditional_response(
+            request, etag=etags[encoding]
+        )
+        if response is None:
+            response = HttpResponse(
+                bodies[encoding], content_type='application/json'
+            )
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etags[encoding]
+        response['Cache-Control'] = (
+            f'public, max-age={settings.REFERENCE_CACHE_MAX_AGE}, '
+            f'stale-while-revalidate={settings.REFERENCE_CACHE_STALE}'
+        )
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+def get_tags_data():
+    return list(
+        Tag.objects.values('id', 'name', 'color', 'slug').order_by('name')
+    )
+
+
+ingredient_index = IngredientIndex(ttl=settings.INGREDIENT_INDEX_TTL)
+tag_registry = TagRegistry(ttl=settings.TAG_REGISTRY_TTL)
+tags_blob = JsonBlob(get_tags_data, ttl=settings.TAG_REGISTRY_TTL)
+ingredients_blob = JsonBlob(
+    ingredient_index.all, ttl=settings.INGREDIENT_INDEX_TTL
+)
@@ -0,0 +1,134 @@
+import csv
+import json
+import os
+from tempfile import SpooledTemporaryFile
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import renderers
+
+PDF_FONT = 'DejaVuSans'
+PDF_FONT_PATH = os.path.join(
+    os.path.dirname(__file__), 'fonts', 'DejaVuSans.ttf'
+)
+
+
+class Echo:
+    """Файлоподобный объект, возвращающий записанную строку."""
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(renderers.BaseRenderer):
+    """Базовый потоковый рендерер списка покупок."""
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+    def render_rows(self, rows):
+        raise NotImplementedError(
+            'render_rows() must be implemented.'
+        )
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def render_rows(self, rows):
+        yield 'Список продуктов:\n'
+        for name, measurement_unit, amount in rows:
+            yield f'{name} ({measurement_unit}) - {amount}\n'
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_rows(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('Ингредиент', 'Единица измерения', 'Количество')
+        )
+        for row in rows:
+            yield writer.writerow(row)
+
+
+class ShoppingCartJSONRenderer(ShoppingCartRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def render_rows(self, rows):
+        yield '['
+        separator = ''
+        for name, measurement_unit, amount in rows:
+            yield separator + json.dumps(
+                {
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                    'amount': amount
+                },
+                ensure_ascii=False
+            )
+            separator = ','
+        yield ']'
+
+
+class ShoppingCartPDFRenderer(ShoppingCartTextRenderer):
+    """Строки текстового списка на страницах A4.
+
+    Базовые шрифты PDF не содержат кириллицы, поэтому используется
+    DejaVu Sans из api/fonts. Документ собирается во временном файле,
+    который переходит на диск после spool_size байт, и отдаётся
+    частями.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    render_style = 'binary'
+    font_size = 12
+    margin = 20 * mm
+    spool_size = 1024 * 1024
+    chunk_size = 64 * 1024
+
+    def get_font(self):
+        if PDF_FONT not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(PDF_FONT, PDF_FONT_PATH))
+        return PDF_FONT
+
+    def render_rows(self, rows):
+        font = self.get_font()
+        width, height = A4
+        line_height = self.font_size * 1.5
+        with SpooledTemporaryFile(max_size=self.spool_size) as file:
+            pdf = canvas.Canvas(file, pagesize=A4)
+            pdf.setFont(font, self.font_size)
+            top = y = height - self.margin
+            for text in super().render_rows(rows):
+                for line in simpleSplit(
+                    text.rstrip('\n'), font, self.font_size,
+                    width - 2 * self.margin
+                ):
+                    if y < self.margin:
+                        pdf.showPage()
+                        pdf.setFont(font, self.font_size)
+                        y = top
+                    pdf.drawString(self.margin, y, line)
+                    y -= line_height
+            pdf.save()
+            file.seek(0)
+            for chunk in iter(lambda: file.read(self.chunk_size), b''):
+                yield chunk
+
+
+SHOPPING_CART_RENDERERS = (
+    ShoppingCartTextRenderer,
+    ShoppingCartCSVRenderer,
+    ShoppingCartJSONRenderer,
+    ShoppingCartPDFRenderer,
+)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import caches
+from foodgram.routers import read_from, replica_reads
+from rest_framework.permissions import SAFE_METHODS
+
+
+def get_pin_key(user_id):
+    return f'db:primary:{user_id}'
+
+
+def pin_to_primary(user):
+    """Направляет чтения пользователя в основную базу на время,
+    за которое реплики успевают догнать его запись."""
+    caches[settings.RECIPES_CACHE_ALIAS].set(
+        get_pin_key(user.pk), True, settings.REPLICA_STICKY_SECONDS
+    )
+
+
+def is_pinned(user):
+    return user.is_authenticated and caches[
+        settings.RECIPES_CACHE_ALIAS
+    ].get(get_pin_key(user.pk), False)
+
+
+class ReplicaReadMixin:
+    """Читает безопасные запросы с реплик.
+
+    replica_actions ограничивает действия, которые можно читать
+    с реплик; None — все. После успешной записи пользователь
+    закрепляется за основной базой на REPLICA_STICKY_SECONDS.
+    """
+    replica_actions = None
+
+    def dispatch(self, request, *args, **kwargs):
+        # Значение, выставленное в initial, сбрасывается при выходе
+        with read_from(False):
+            return super().dispatch(request, *args, **kwargs)
+
+    def use_replica(self, request):
+        return (
+            bool(settings.READ_REPLICAS)
+            and request.method in SAFE_METHODS
+            and (
+                self.replica_actions is None
+                or self.action in self.replica_actions
+            )
+            and not is_pinned(request.user)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.use_replica(request):
+            replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
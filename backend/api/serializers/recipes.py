@@ -1,34 +1,40 @@
+from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.images import schedule_renditions
+from recipes.models import (CartIngredient, Ingredient, Recipe,
+                            RecipeIngredient, Tag)
 from rest_framework import serializers
 
+from ..fields import ImageRenditionsField, RecipeImageField
+from ..metrics import TimedSerializerMixin
 from .users import UserSerializer
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Тэги."""
     class Meta:
         model = Tag
         fields = ('id', 'name', 'color', 'slug')
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Ингредиенты."""
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit')
 
 
-class ShortRecipeReadSerializer(serializers.Serializer):
+class ShortRecipeReadSerializer(TimedSerializerMixin, serializers.Serializer):
     """Короткая сводка рецепта."""
     name = serializers.ReadOnlyField()
     image = Base64ImageField(read_only=True)
+    images = ImageRenditionsField()
     cooking_time = serializers.ReadOnlyField()
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'name', 'image', 'cooking_time'
+            'id', 'name', 'image', 'images', 'cooking_time'
         )
 
 
@@ -53,11 +59,12 @@ class ReciperCreateIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Полная сводка рецепта."""
     tags = TagSerializer(read_only=True, many=True)
     ingredients = RecipeIngredientSerializer(many=True, source='recipe')
     author = UserSerializer(read_only=True)
+    images = ImageRenditionsField()
     is_favorited = serializers.BooleanField(
         default=False
     )
@@ -69,16 +76,17 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image',
+                  'name', 'image', 'images',
                   'text', 'cooking_time', 'pub_date',)
 
 
-class RecipeCreateSerializer(serializers.ModelSerializer):
+class RecipeCreateSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     """Создание/обновление рецепта."""
     ingredients = ReciperCreateIngredientSerializer(
         many=True
     )
-    image = Base64ImageField()
+    image = RecipeImageField()
 
     class Meta:
         model = Recipe
@@ -95,53 +103,103 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'cooking_time': {'required': True}
         }
 
-    def validate(self, obj):
-        ingredients_list = [ingredient['id'] for ingredient in obj.get(
-            'ingredients')]
-        if len(ingredients_list) != len(set(ingredients_list)):
-            raise serializers.ValidationError(
-                'Ингредиенты не должны повторяться!'
+    def validate_ingredients(self, ingredients):
+        ids = [ingredient['id'] for ingredient in ingredients]
+        existing = Ingredient.objects.in_bulk(ids)
+        errors = []
+        seen = set()
+        for ingredient_id in ids:
+            if ingredient_id not in existing:
+                errors.append({'id': [
+                    f'Ингредиента с id={ingredient_id} не существует.'
+                ]})
+            elif ingredient_id in seen:
+                errors.append({'id': ['Ингредиенты не должны повторяться!']})
+            else:
+                errors.append({})
+            seen.add(ingredient_id)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return ingredients
+
+    def set_ingredients(self, recipe, ingredients):
+        """Сохраняет ингредиенты, меняя только отличающиеся строки."""
+        old_amounts = {}
+        existing = {}
+        duplicates = []
+        for row in RecipeIngredient.objects.filter(recipe=recipe):
+            old_amounts[row.ingredient_id] = (
+                old_amounts.get(row.ingredient_id, 0) + row.amount
             )
-        return obj
-
-    def create(self, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
-        recipe = Recipe.objects.create(**validated_data)
+            if row.ingredient_id in existing:
+                duplicates.append(row.pk)
+            else:
+                existing[row.ingredient_id] = row
+        new_amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        changed = []
+        for ingredient_id, row in existing.items():
+            if (ingredient_id in new_amounts
+                    and row.amount != new_amounts[ingredient_id]):
+                row.amount = new_amounts[ingredient_id]
+                changed.append(row)
+        removed = [
+            row.pk for ingredient_id, row in existing.items()
+            if ingredient_id not in new_amounts
+        ]
+        if removed or duplicates:
+            RecipeIngredient.objects.filter(
+                pk__in=removed + duplicates
+            ).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
         RecipeIngredient.objects.bulk_create(
             RecipeIngredient(
                 recipe=recipe,
-                ingredient=Ingredient.objects.get(
-                    id=ingredient['id']
-                ),
-                amount=ingredient['amount']
+                ingredient_id=ingredient_id,
+                amount=amount
             )
-            for ingredient in ingredients
+            for ingredient_id, amount in new_amounts.items()
+            if ingredient_id not in existing
         )
+        if old_amounts != new_amounts:
+            CartIngredient.objects.change_recipe(
+                recipe, old_amounts, new_amounts
+            )
+
+    @transaction.atomic
+    def create(self, validated_data):
+        ingredients = validated_data.pop('ingredients')
+        tags = validated_data.pop('tags')
+        recipe = Recipe.objects.create(**validated_data)
+        self.set_ingredients(recipe, ingredients)
         recipe.tags.set(tags)
+        schedule_renditions(recipe.image.name)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
-        RecipeIngredient.objects.filter(
-            recipe__id=instance.id
-        ).delete()
-        RecipeIngredient.objects.bulk_create(
-            RecipeIngredient(
-                recipe=instance,
-                ingredient=Ingredient.objects.get(
-                    id=ingredient['id']
-                ),
-                amount=ingredient['amount']
-            )
-            for ingredient in ingredients
-        )
+        self.set_ingredients(instance, ingredients)
         tags = validated_data.pop('tags')
         instance.tags.set(tags)
-        instance.image = validated_data.get('image', instance.image)
+        image = validated_data.get('image')
+        # Клиент присылает картинку и при редактировании без её замены;
+        # байты сохранённого файла совпадают с его именем-хэшем
+        image_changed = image is not None and (
+            instance.image.storage.get_digest(instance.image.name)
+            != image.source_digest
+        )
+        if image_changed:
+            instance.image = image
+            instance.images_ready = False
         instance.name = validated_data.get('name', instance.name)
         instance.text = validated_data.get('text', instance.text)
         instance.cooking_time = validated_data.get('cooking_time',
                                                    instance.cooking_time)
         instance.save()
+        if image_changed:
+            schedule_renditions(instance.image.name)
         return instance
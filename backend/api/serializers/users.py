@@ -4,19 +4,23 @@ from recipes.models import Recipe
 from rest_framework import serializers
 from users.models import User
 
+from ..fields import ImageRenditionsField
+from ..metrics import TimedSerializerMixin
+
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """Короткая сводка рецепта."""
     image = Base64ImageField()
+    images = ImageRenditionsField()
 
     class Meta:
         model = Recipe
         fields = (
-            'id', 'name', 'image', 'cooking_time'
+            'id', 'name', 'image', 'images', 'cooking_time'
         )
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Пользователь/список пользователей."""
     is_subscribed = serializers.SerializerMethodField()
 
@@ -27,6 +31,8 @@ class UserSerializer(serializers.ModelSerializer):
                   'is_subscribed')
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if not request.user.is_authenticated:
             return False
@@ -41,11 +47,12 @@ class UserRegSerializer(UserCreateSerializer):
                   'last_name', 'password')
 
 
-class SubscriptionsSerializer(serializers.ModelSerializer):
+class SubscriptionsSerializer(TimedSerializerMixin,
+                              serializers.ModelSerializer):
     """Подписки."""
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -56,14 +63,16 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if not request.user.is_authenticated:
             return False
         return request.user.follower.filter(author=obj).exists()
 
     def get_recipes(self, obj):
-        queryset = obj.recipes.all()
+        if hasattr(obj, 'recipes_preview'):
+            queryset = obj.recipes_preview
+        else:
+            queryset = obj.recipes.all()
         return ShortRecipeSerializer(queryset, many=True).data
-
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import (Cart, Favourite, Follow, Ingredient, Recipe,
+                            RecipeIngredient, Tag)
+from recipes.signals import recipes_imported, renditions_built, scores_updated
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from .authentication import invalidate_token
+from .cache import bump_generation, invalidate_user_flags
+from .reference import (ingredient_index, ingredients_blob, tag_registry,
+                        tags_blob)
+
+USER_PUBLIC_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+    ingredients_blob.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tag_registry(sender, **kwargs):
+    tag_registry.invalidate()
+    tags_blob.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes_cache(sender, **kwargs):
+    transaction.on_commit(bump_generation)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_recipes_cache_for_user(sender, update_fields=None, **kwargs):
+    if update_fields is None or USER_PUBLIC_FIELDS & set(update_fields):
+        transaction.on_commit(bump_generation)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_token(instance.key))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    if created:
+        return
+    keys = list(Token.objects.filter(user_id=instance.pk).values_list(
+        'key', flat=True
+    ))
+
+    def invalidate():
+        for key in keys:
+            invalidate_token(key)
+    transaction.on_commit(invalidate)
+
+
+@receiver([post_save, post_delete], sender=Favourite)
+@receiver([post_save, post_delete], sender=Cart)
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_user_flags_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_user_flags(instance.user_id))
+
+
+@receiver(recipes_imported)
+def invalidate_after_import(sender, **kwargs):
+    ingredient_index.invalidate()
+    ingredients_blob.invalidate()
+    tag_registry.invalidate()
+    tags_blob.invalidate()
+    bump_generation()
+
+
+@receiver(scores_updated)
+def invalidate_after_scores_update(sender, **kwargs):
+    bump_generation()
+
+
+@receiver(renditions_built)
+def invalidate_after_renditions(sender, **kwargs):
+    bump_generation()
@@ -0,0 +1,105 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.test import override_settings
+from PIL import Image
+from recipes.images import mark_renditions_ready
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.test import APITestCase
+from users.models import User
+
+
+class ImageRenditionsTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/image.jpg'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_urls(self):
+        response = self.client.get(f'/api/recipes/{self.recipe.pk}/')
+        return {
+            url
+            for formats in response.data['images'].values()
+            for url in formats.values()
+        }
+
+    def test_original_until_renditions_are_built(self):
+        self.assertEqual(
+            self.get_urls(), {'http://testserver/media/recipes/image.jpg'}
+        )
+        mark_renditions_ready('recipes/image.jpg')
+        self.assertTrue(all(
+            '/media/recipes/renditions/image_' in url
+            for url in self.get_urls()
+        ))
+
+
+def make_image(color):
+    buffer = BytesIO()
+    Image.new('RGB', (10, 10), color).save(buffer, 'PNG')
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+class RecipeImageUpdateTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass'
+        )
+        cls.tag = Tag.objects.create(
+            name='Обед', color='#49B64E', slug='lunch'
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='Соль', measurement_unit='г'
+        )
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_authenticate(self.author)
+
+    def send(self, method, url, image):
+        return getattr(self.client, method)(url, {
+            'name': 'Рецепт',
+            'text': 'Текст',
+            'cooking_time': 10,
+            'tags': [self.tag.pk],
+            'ingredients': [{'id': self.ingredient.pk, 'amount': 5}],
+            'image': image,
+        }, format='json')
+
+    def test_resent_image_keeps_renditions(self):
+        response = self.send('post', '/api/recipes/', make_image('red'))
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(author=self.author)
+        Recipe.objects.update(images_ready=True)
+        url = f'/api/recipes/{recipe.pk}/'
+        with recipe.image.open('rb') as file:
+            stored = base64.b64encode(file.read()).decode()
+        self.assertEqual(self.send('patch', url, stored).status_code, 200)
+        recipe.refresh_from_db()
+        self.assertTrue(recipe.images_ready)
+        old_name = recipe.image.name
+        self.send('patch', url, make_image('blue'))
+        recipe.refresh_from_db()
+        self.assertFalse(recipe.images_ready)
+        self.assertNotEqual(recipe.image.name, old_name)
@@ -0,0 +1,61 @@
+import json
+from base64 import b64encode
+
+from django.core.cache import cache
+from recipes.models import Recipe
+from rest_framework.test import APITestCase
+from users.models import User
+
+
+def make_cursor(value, pk, reverse=False):
+    return b64encode(json.dumps([value, pk, reverse]).encode()).decode()
+
+
+class CursorPaginationTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass'
+        )
+        for number in range(3):
+            Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт {number}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/image.jpg'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pages(self):
+        response = self.client.get('/api/recipes/?cursor=&limit=2')
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_invalid_cursor_values(self):
+        self.client.force_authenticate(self.author)
+        cursors = (
+            'не base64',
+            make_cursor('не дата', 1),
+            make_cursor('2024-01-01T00:00:00+00:00', 'не число'),
+            make_cursor(None, 1),
+            make_cursor(['2024-01-01'], 1),
+        )
+        for url in ('/api/recipes/', '/api/recipes/feed/'):
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 404)
+
+    def test_cursor_on_score_ordering(self):
+        response = self.client.get(
+            '/api/recipes/?cursor=&limit=2&ordering=popular'
+        )
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from recipes.models import (Favourite, Follow, Ingredient, Recipe,
+                            RecipeIngredient, Tag)
+from rest_framework.test import APITestCase
+from users.models import User
+
+RECIPES = 8
+
+
+class RecipeQueriesTest(APITestCase):
+    """Число запросов к базе при чтении рецептов не зависит от размера
+    страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.com', username='reader', password='pass'
+        )
+        tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}',
+                               color=f'#00000{number}')
+            for number in range(2)
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=f'Ингредиент {number}',
+                                      measurement_unit='г')
+            for number in range(3)
+        ]
+        for number in range(RECIPES):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт {number}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/image.jpg'
+            )
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=10)
+                for ingredient in ingredients
+            )
+            Favourite.objects.create(user=cls.reader, recipe=recipe)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.recipe = Recipe.objects.first()
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_list_queries(self, queries, params=''):
+        for limit in (1, RECIPES):
+            cache.clear()
+            with self.assertNumQueries(queries):
+                response = self.client.get(
+                    f'/api/recipes/?limit={limit}{params}'
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), limit)
+        return response
+
+    def test_list_anonymous(self):
+        self.assert_list_queries(5)
+
+    def test_list_authenticated(self):
+        self.client.force_authenticate(self.reader)
+        response = self.assert_list_queries(6)
+        recipe = response.data['results'][0]
+        self.assertTrue(recipe['is_favorited'])
+        self.assertTrue(recipe['author']['is_subscribed'])
+
+    def test_list_personal_filter(self):
+        self.client.force_authenticate(self.reader)
+        response = self.assert_list_queries(5, '&is_favorited=1')
+        self.assertTrue(response.data['results'][0]['author']['is_subscribed'])
+
+    def test_retrieve_anonymous(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve_authenticated(self):
+        self.client.force_authenticate(self.reader)
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertTrue(response.data['is_favorited'])
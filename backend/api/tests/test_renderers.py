@@ -0,0 +1,89 @@
+import json
+
+from django.test import SimpleTestCase
+from recipes.models import Cart, Ingredient, Recipe, RecipeIngredient
+from rest_framework.test import APITestCase
+from users.models import User
+
+from ..renderers import ShoppingCartJSONRenderer, ShoppingCartPDFRenderer
+
+
+class ShoppingCartJSONRendererTest(SimpleTestCase):
+
+    def test_bracket_is_sent_before_rows(self):
+        consumed = []
+
+        def rows():
+            consumed.append(True)
+            yield 'Соль', 'г', 5
+            yield 'Мука', 'г', 500
+
+        chunks = ShoppingCartJSONRenderer().render_rows(rows())
+        self.assertEqual(next(chunks), '[')
+        self.assertFalse(consumed)
+        self.assertEqual(
+            json.loads('[' + ''.join(chunks)),
+            [
+                {'name': 'Соль', 'measurement_unit': 'г', 'amount': 5},
+                {'name': 'Мука', 'measurement_unit': 'г', 'amount': 500},
+            ]
+        )
+
+    def test_empty_list(self):
+        rendered = ''.join(ShoppingCartJSONRenderer().render_rows(iter(())))
+        self.assertEqual(json.loads(rendered), [])
+
+
+class ShoppingCartPDFRendererTest(SimpleTestCase):
+
+    def test_pages(self):
+        rows = ((f'Ингредиент {number}', 'г', number) for number in range(100))
+        pdf = b''.join(ShoppingCartPDFRenderer().render_rows(rows))
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertIn(b'DejaVuSans', pdf)
+        self.assertEqual(pdf.count(b'/Type /Page\n'), 3)
+
+
+class DownloadShoppingCartTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user', password='pass'
+        )
+        recipe = Recipe.objects.create(
+            author=cls.user,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/image.jpg'
+        )
+        RecipeIngredient.objects.create(
+            recipe=recipe,
+            ingredient=Ingredient.objects.create(
+                name='Соль', measurement_unit='г'
+            ),
+            amount=5
+        )
+        Cart.objects.create(user=cls.user, recipe=recipe)
+
+    def test_formats(self):
+        self.client.force_authenticate(self.user)
+        for extension, content_type in (
+            ('txt', 'text/plain; charset=utf-8'),
+            ('csv', 'text/csv; charset=utf-8'),
+            ('json', 'application/json; charset=utf-8'),
+            ('pdf', 'application/pdf'),
+        ):
+            with self.subTest(format=extension):
+                response = self.client.get(
+                    '/api/recipes/download_shopping_cart/',
+                    {'format': extension}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], content_type)
+                self.assertIn(
+                    f'shopping_cart.{extension}',
+                    response['Content-Disposition']
+                )
+                self.assertTrue(b''.join(response.streaming_content))
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import make_async
 from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
 
 router = DefaultRouter()
@@ -9,8 +11,18 @@ router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('tags', TagViewSet, basename='tags')
 router.register('users', UserViewSet, basename='users')
 
+ASYNC_ROUTES = (
+    'recipes-list', 'recipes-detail',
+    'tags-list', 'tags-detail',
+    'ingredients-list', 'ingredients-detail',
+    'users-subscriptions',
+)
+
+router_urls = router.urls
+if settings.ASYNC_VIEWS:
+    router_urls = make_async(router_urls, ASYNC_ROUTES)
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
-    path('', include(router.urls))
+    path('', include(router_urls))
 ]
@@ -1,41 +1,71 @@
-from django.db.models import Exists, OuterRef, Sum
-from django.http import HttpResponse
+import codecs
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Subquery, Value
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from recipes.models import (Cart, Favourite, Follow, Ingredient, Recipe,
-                            RecipeIngredient, Tag)
-from rest_framework import filters, mixins, permissions, status, viewsets
+from recipes.feed import backfill_feed, remove_from_feed
+from recipes.models import (Cart, CartIngredient, Favourite, Follow,
+                            Ingredient, Recipe, RecipeIngredient, Tag)
+from recipes.transfer import RecipeImporter, export_recipes
+from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from users.models import User
 
-from .filters import IngredientFilter, RecipeFilter
-from .permissions import IsAdminOwnerOrReadOnly
+from .cache import SharedCacheMixin
+from .filters import RecipeFilter, RecipeOrderingFilter, RecipeSearchFilter
+from .paginations import FeedPaginator, RecipePaginator
+from .permissions import IsAdmin, IsAdminOwnerOrReadOnly
+from .reference import ingredient_index, ingredients_blob, tags_blob
+from .renderers import SHOPPING_CART_RENDERERS
+from .replicas import ReplicaReadMixin
 from .serializers.recipes import (IngredientSerializer, RecipeCreateSerializer,
                                   RecipeSerializer, ShortRecipeReadSerializer,
                                   TagSerializer)
 from .serializers.users import SubscriptionsSerializer, UserSerializer
 
 
-class ListRetrieveViewSet(mixins.ListModelMixin,
+class ListRetrieveViewSet(ReplicaReadMixin,
+                          mixins.ListModelMixin,
                           mixins.RetrieveModelMixin,
                           viewsets.GenericViewSet):
     pass
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, SharedCacheMixin,
+                    viewsets.ModelViewSet):
     permission_classes = (IsAdminOwnerOrReadOnly,)
+    pagination_class = RecipePaginator
     filter_backends = (DjangoFilterBackend,
-                       filters.OrderingFilter)
+                       RecipeOrderingFilter,
+                       RecipeSearchFilter)
     filterset_class = RecipeFilter
-    ordering_fields = ('pub_date',)
+    ordering_fields = ('pub_date', 'favorites_count')
     ordering = ('pub_date',)
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_authenticated:
-            new_queryset = Recipe.objects.all().annotate(
+        authors = User.objects.annotate(is_subscribed=Value(False))
+        new_queryset = Recipe.objects.prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
+        if user.is_authenticated and not self.shared_payload:
+            authors = User.objects.annotate(
+                is_subscribed=Exists(Follow.objects.filter(
+                    user=user,
+                    author=OuterRef('pk')
+                ))
+            )
+            new_queryset = new_queryset.annotate(
                 is_favorited=Exists(Favourite.objects.filter(
                     user=user,
                     recipe=OuterRef("pk")
@@ -45,9 +75,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     recipe=OuterRef("pk")
                 ))
             )
-        else:
-            new_queryset = Recipe.objects.all()
-        return new_queryset
+        return new_queryset.prefetch_related(
+            Prefetch('author', queryset=authors)
+        )
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
@@ -74,9 +104,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     {"errors": "Рецепт уже добавлен в список избранного!"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            favorite_recipe = Favourite.objects.create(
-                user=user, recipe=recipe
-            )
+            with transaction.atomic():
+                Favourite.objects.create(user=user, recipe=recipe)
             serializer = ShortRecipeReadSerializer(
                 recipe
             )
@@ -94,7 +123,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 user=user,
                 recipe=recipe
             )
-            favorite_recipe.delete()
+            with transaction.atomic():
+                favorite_recipe.delete()
             return Response(
                 {"details": "Рецепт удален из издранных!"},
                 status=status.HTTP_204_NO_CONTENT
@@ -117,9 +147,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     {"errors": "Рецепт уже добавлен в список покупок!"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            cart_recipe = Cart.objects.create(
-                user=user, recipe=recipe
-            )
+            with transaction.atomic():
+                Cart.objects.create(user=user, recipe=recipe)
             serializer = ShortRecipeReadSerializer(
                 recipe
             )
@@ -137,7 +166,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 user=user,
                 recipe=recipe
             )
-            cart_recipe.delete()
+            with transaction.atomic():
+                cart_recipe.delete()
             return Response(
                 {"details": "Рецепт успешно удален из списка покупок!"},
                 status=status.HTTP_204_NO_CONTENT
@@ -146,31 +176,92 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         methods=('get',),
-        permission_classes=(permissions.IsAuthenticated,)
+        permission_classes=(permissions.IsAuthenticated,),
+        renderer_classes=SHOPPING_CART_RENDERERS
     )
     def download_shopping_cart(self, request):
-        ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__cart__user=request.user
-            ).values('ingredient').annotate(
-                amount=Sum('amount')
-            ).values_list(
-                'ingredient__name',
-                'ingredient__measurement_unit',
-                'amount'
-            )
+        ingredients = CartIngredient.objects.filter(
+            user=request.user
+        ).values_list(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'amount'
+        ).order_by('ingredient__name')
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f'; charset={renderer.charset}'
+        response = StreamingHttpResponse(
+            renderer.render_rows(ingredients.iterator(chunk_size=500)),
+            content_type=content_type
         )
-        shopping_cart = 'Список продуктов:\n'
-        for item in ingredients:
-            shopping_cart += (
-                f'{item[0]} ({item[1]}) - {item[2]}\n'
-            )
-        response = HttpResponse(shopping_cart, content_type="text/plain")
         response['Content-Disposition'] = (
-            'attachment; filename=shopping_cart.txt'
+            f'attachment; filename=shopping_cart.{renderer.format}'
         )
         return response
 
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def feed(self, request):
+        paginator = FeedPaginator()
+        page = paginator.paginate_queryset(
+            self.get_queryset(), request, self
+        )
+        serializer = RecipeSerializer(
+            page,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAdmin,),
+        url_path='export'
+    )
+    def export_recipes(self, request):
+        include_images = request.query_params.get('images') in (
+            '1', 'true', 'True'
+        )
+        response = StreamingHttpResponse(
+            export_recipes(include_images=include_images),
+            content_type='application/x-ndjson; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename=recipes.jsonl'
+        )
+        return response
+
+    @action(
+        detail=False,
+        methods=('post',),
+        permission_classes=(IsAdmin,),
+        parser_classes=(MultiPartParser,),
+        url_path='import'
+    )
+    def import_recipes(self, request):
+        file = request.FILES.get('file')
+        if file is None:
+            return Response(
+                {'file': ['Обязательное поле.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            start = int(request.data.get('start', 0))
+        except ValueError:
+            return Response(
+                {'start': ['Требуется целое число.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        stats = RecipeImporter().run(
+            codecs.iterdecode(file, 'utf-8'), start=start
+        )
+        return Response(stats.as_dict())
+
 
 class TagViewSet(ListRetrieveViewSet):
     queryset = Tag.objects.all()
@@ -178,19 +269,29 @@ class TagViewSet(ListRetrieveViewSet):
     pagination_class = None
     permission_classes = (permissions.AllowAny,)
 
+    def list(self, request, *args, **kwargs):
+        return tags_blob.response(request)
+
 
 class IngredientViewSet(ListRetrieveViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
     permission_classes = (permissions.AllowAny,)
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilter
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(
+                name, settings.INGREDIENT_SEARCH_LIMIT
+            ))
+        return ingredients_blob.response(request)
 
 
-class UserViewSet(UserViewSet):
+class UserViewSet(ReplicaReadMixin, UserViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    replica_actions = ('list', 'subscriptions')
 
     @action(
         detail=False,
@@ -200,14 +301,34 @@ class UserViewSet(UserViewSet):
         self.get_object = self.get_instance
         return self.retrieve(request)
 
+    def get_authors_queryset(self, authors):
+        user = self.request.user
+        recipes = Recipe.objects.order_by('-pub_date')
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).order_by('-pub_date').values('pk')[:int(recipes_limit)]
+            ))
+        return authors.annotate(
+            is_subscribed=Exists(Follow.objects.filter(
+                user=user,
+                author=OuterRef('pk')
+            ))
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recipes_preview')
+        ).order_by('id')
+
     @action(
         detail=False,
         methods=('get',),
         permission_classes=(permissions.IsAuthenticated,)
     )
     def subscriptions(self, request):
-        follows = request.user.follower.all().values_list('author', flat=True)
-        authors = User.objects.filter(id__in=list(follows))
+        authors = self.get_authors_queryset(
+            User.objects.filter(following__user=request.user)
+        )
         results = self.paginate_queryset(authors)
         serializer = SubscriptionsSerializer(
             results,
@@ -238,11 +359,15 @@ class UserViewSet(UserViewSet):
                     {"errors": "Вы пытаетесь подписаться на самого себя!"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            follow = Follow.objects.create(
-                user=user,
-                author=author
-            )
-            author = User.objects.get(id=follow.author.id)
+            with transaction.atomic():
+                Follow.objects.create(
+                    user=user,
+                    author=author
+                )
+                backfill_feed(user, author)
+            author = self.get_authors_queryset(
+                User.objects.filter(id=author.id)
+            ).get()
             serializer = SubscriptionsSerializer(
                 author,
                 context={'request': request}
@@ -258,7 +383,9 @@ class UserViewSet(UserViewSet):
                     user=request.user,
                     author=author
                 )
-                follow.delete()
+                with transaction.atomic():
+                    follow.delete()
+                    remove_from_feed(user, author)
                 return Response(
                     {"details": "Подписка удалена"},
                     status=status.HTTP_204_NO_CONTENT
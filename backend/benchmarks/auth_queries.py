@@ -0,0 +1,67 @@
+"""Запросы к базе и время аутентификации по токену.
+
+Выполняет запросы к API внутри процесса через тестовый клиент Django
+с TokenAuthentication и с CachedTokenAuthentication и печатает число
+SQL-запросов на запрос и среднее время. Запускается из каталога
+backend с теми же переменными окружения, что и приложение:
+
+    python benchmarks/auth_queries.py --token <токен> --path /api/tags/
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.authentication import CachedTokenAuthentication  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.authentication import TokenAuthentication  # noqa: E402
+from rest_framework.views import APIView  # noqa: E402
+
+
+def measure(client, path, headers, iterations):
+    queries = 0
+    elapsed = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = client.get(path, **headers)
+            elapsed += time.perf_counter() - started
+        if response.status_code != 200:
+            raise SystemExit(f'{path}: ответ {response.status_code}')
+        queries += len(context.captured_queries)
+    return queries / iterations, elapsed / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--token', required=True)
+    parser.add_argument('--path', default='/api/tags/')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--iterations', type=int, default=200)
+    options = parser.parse_args()
+    client = Client()
+    headers = {
+        'HTTP_AUTHORIZATION': f'Token {options.token}',
+        'HTTP_HOST': options.host,
+    }
+    print(f'{"аутентификация":<28}{"запросов к БД":>15}{"среднее, мс":>14}')
+    for authentication in (TokenAuthentication, CachedTokenAuthentication):
+        APIView.authentication_classes = [authentication]
+        client.get(options.path, **headers)
+        queries, mean = measure(
+            client, options.path, headers, options.iterations
+        )
+        print(f'{authentication.__name__:<28}{queries:>15.1f}{mean:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Стоимость соединения с базой на один запрос.
+
+Имитирует цикл запроса Django (request_started, запрос к базе,
+request_finished) с CONN_MAX_AGE=0 и с постоянным соединением и
+печатает среднюю и p99 задержку. Запускается из каталога backend
+с теми же переменными окружения, что и приложение:
+
+    python benchmarks/db_connections.py --iterations 500
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.signals import request_finished, request_started  # noqa
+from django.db import connection  # noqa: E402
+
+
+def measure(iterations, conn_max_age, health_checks):
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+    connection.health_check_enabled = health_checks
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        request_finished.send(sender=None)
+        timings.append(time.perf_counter() - started)
+    connection.close()
+    timings.sort()
+    return (
+        sum(timings) / len(timings) * 1000,
+        timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    options = parser.parse_args()
+    print(f'{"режим":<32}{"среднее, мс":>14}{"p99, мс":>10}')
+    for title, conn_max_age, health_checks in (
+        ('новое соединение', 0, False),
+        ('постоянное соединение', 60, False),
+        ('постоянное + проверка', 60, True),
+    ):
+        mean, p99 = measure(options.iterations, conn_max_age, health_checks)
+        print(f'{title:<32}{mean:>14.2f}{p99:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Нагрузочный тест API: запросы в секунду и задержки по перцентилям.
+
+Запускает заданное число параллельных клиентов на фиксированное время
+для каждой цели и печатает сводку, например для сравнения WSGI и ASGI
+на одной машине:
+
+    python benchmarks/load_test.py \\
+        --target wsgi=http://localhost:8000 \\
+        --target asgi=http://localhost:8001 \\
+        --path /api/recipes/ --path /api/tags/ \\
+        --concurrency 64 --duration 30
+"""
+import argparse
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+def worker(base_url, paths, headers, deadline, latencies, errors, lock):
+    session = requests.Session()
+    local_latencies = []
+    local_errors = 0
+    for path in itertools.cycle(paths):
+        if time.monotonic() >= deadline:
+            break
+        started = time.monotonic()
+        try:
+            response = session.get(base_url + path, headers=headers)
+            if response.status_code >= 400:
+                local_errors += 1
+        except requests.RequestException:
+            local_errors += 1
+        local_latencies.append(time.monotonic() - started)
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+
+
+def run(base_url, paths, headers, concurrency, duration):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(
+                worker, base_url, paths, headers, deadline,
+                latencies, errors, lock
+            )
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'rps': len(latencies) / duration,
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--target', action='append', required=True,
+        help='имя=адрес, например asgi=http://localhost:8001'
+    )
+    parser.add_argument(
+        '--path', action='append', default=None,
+        help='путь запроса, можно указать несколько раз'
+    )
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--token', help='токен для заголовка Authorization')
+    options = parser.parse_args()
+    paths = options.path or ['/api/recipes/', '/api/tags/']
+    headers = {'Accept-Encoding': 'gzip'}
+    if options.token:
+        headers['Authorization'] = f'Token {options.token}'
+    print(f'{"цель":<10}{"запросов":>10}{"ошибок":>8}'
+          f'{"RPS":>10}{"p50, мс":>10}{"p99, мс":>10}')
+    for target in options.target:
+        name, _, base_url = target.partition('=')
+        base_url = base_url.rstrip('/')
+        if options.warmup:
+            run(base_url, paths, headers, options.concurrency,
+                options.warmup)
+        result = run(
+            base_url, paths, headers, options.concurrency, options.duration
+        )
+        print(f'{name:<10}{result["requests"]:>10}{result["errors"]:>8}'
+              f'{result["rps"]:>10.1f}{result["p50"]:>10.1f}'
+              f'{result["p99"]:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def is_shared_cache(alias):
+    """Видят ли все процессы сервера одни и те же записи кэша."""
+    return not isinstance(caches[alias], LOCAL_CACHES)
+
+
+def check_shared_caches():
+    """Не даёт запустить сервер с кэшем в памяти процесса.
+
+    Поколения данных рецептов, закрепления за основной базой и токены
+    в таком кэше не видны другим воркерам.
+    """
+    if not settings.REQUIRE_SHARED_CACHE:
+        return
+    aliases = {settings.RECIPES_CACHE_ALIAS, settings.AUTH_TOKEN_CACHE_ALIAS}
+    local = sorted(alias for alias in aliases if not is_shared_cache(alias))
+    if local:
+        raise ImproperlyConfigured(
+            'Кэш {} хранится в памяти процесса. Настройте общий кэш '
+            '(CACHE_BACKEND и CACHE_LOCATION) или задайте '
+            'REQUIRE_SHARED_CACHE=False для одного процесса.'.format(
+                ', '.join(local)
+            )
+        )
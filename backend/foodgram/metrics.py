@@ -0,0 +1,266 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = 'unresolved'
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n'
+    )
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus, общая для процесса."""
+
+    def __init__(self, name, documentation, buckets, labels):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [
+                    [0] * len(self.buckets), 0.0, 0
+                ]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            series = sorted(
+                (labels, list(counts), total, count)
+                for labels, (counts, total, count) in self._series.items()
+            )
+        for labels, counts, total, count in series:
+            label_text = ','.join(
+                f'{name}="{escape_label(value)}"'
+                for name, value in zip(self.labels, labels)
+            )
+            prefix = f'{label_text},' if label_text else ''
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{{prefix}le="{bound:g}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return '\n'.join(lines)
+
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+request_duration = Histogram(
+    'foodgram_request_duration_seconds',
+    'Время обработки запроса.',
+    SECONDS_BUCKETS,
+    ('view', 'method', 'status')
+)
+request_queries = Histogram(
+    'foodgram_request_db_queries',
+    'Количество SQL-запросов на запрос.',
+    QUERY_BUCKETS,
+    ('view', 'method')
+)
+request_db_duration = Histogram(
+    'foodgram_request_db_duration_seconds',
+    'Время SQL-запросов на запрос.',
+    SECONDS_BUCKETS,
+    ('view', 'method')
+)
+request_serializer_duration = Histogram(
+    'foodgram_request_serializer_duration_seconds',
+    'Время сериализации ответа.',
+    SECONDS_BUCKETS,
+    ('view', 'method')
+)
+HISTOGRAMS = (
+    request_duration,
+    request_queries,
+    request_db_duration,
+    request_serializer_duration,
+)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serializer_timer():
+    """Учитывает время сериализации; вложенные вызовы не суммируются."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+def get_view_name(view_func, method):
+    """ViewSet.action для вьюсетов, имя класса для остальных
+    представлений DRF и модуль.функция для обычных."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return '{}.{}'.format(
+            cls.__name__, actions.get(method.lower(), method.lower())
+        )
+    return cls.__name__
+
+
+def get_budget(view):
+    budget = dict(settings.REQUEST_BUDGETS.get('default', {}))
+    budget.update(settings.REQUEST_BUDGETS.get(view, {}))
+    return budget
+
+
+class RequestMetricsMiddleware:
+    """Время, SQL-запросы и сериализация каждого запроса.
+
+    Пишет заголовок Server-Timing, гистограммы для /metrics и
+    предупреждение в лог, если запрос вышел за бюджет REQUEST_BUDGETS.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all():
+            install_query_recorder(sender=None, connection=connection)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        elapsed = metrics.elapsed
+        match = request.resolver_match
+        if match is not None:
+            metrics.view = get_view_name(match.func, request.method)
+        method = request.method
+        request_duration.observe(
+            elapsed, metrics.view, method, response.status_code
+        )
+        request_queries.observe(metrics.queries, metrics.view, method)
+        request_db_duration.observe(metrics.db_time, metrics.view, method)
+        request_serializer_duration.observe(
+            metrics.serializer_time, metrics.view, method
+        )
+        response['Server-Timing'] = (
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries", '
+            f'serializer;dur={metrics.serializer_time * 1000:.1f}, '
+            f'total;dur={elapsed * 1000:.1f}'
+        )
+        self.check_budget(request, metrics, elapsed)
+        return response
+
+    def check_budget(self, request, metrics, elapsed):
+        budget = get_budget(metrics.view)
+        queries = budget.get('queries')
+        latency = budget.get('latency_ms')
+        if (
+            (queries is not None and metrics.queries > queries)
+            or (latency is not None and elapsed * 1000 > latency)
+        ):
+            logger.warning(
+                'Запрос вышел за бюджет: %s %s (%s) — %d SQL-запросов '
+                'за %.1f мс, всего %.1f мс; бюджет: %s',
+                request.method, request.get_full_path(), metrics.view,
+                metrics.queries, metrics.db_time * 1000, elapsed * 1000,
+                budget
+            )
+
+
+def metrics_view(request):
+    return HttpResponse(
+        '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n',
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,40 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд PostgreSQL с проверкой постоянных соединений.
+
+    При CONN_HEALTH_CHECKS соединение, переживающее запрос, проверяется
+    перед первым использованием в следующем запросе и пересоздаётся,
+    если сервер его уже закрыл (перезапуск базы, таймаут pgbouncer).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS', False
+        )
+        self.health_check_done = False
+
+    def connect(self):
+        # Новое соединение заведомо живое. Флаг ставится до подключения,
+        # как в Django 4.1: set_autocommit внутри connect() вызывает
+        # ensure_connection, и проверка открыла бы транзакцию до
+        # настройки сессии
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.health_check_enabled
+            and not self.health_check_done
+        ):
+            if not self.in_atomic_block and not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
@@ -0,0 +1,49 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def read_from(use_replica):
+    token = replica_reads.set(use_replica)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+def primary():
+    """Чтения внутри блока идут в основную базу."""
+    return read_from(False)
+
+
+class ReplicaRouter:
+    """Отправляет чтения на реплики, если их разрешил текущий запрос.
+
+    По умолчанию все запросы идут в основную базу. Реплики выбираются
+    случайно из READ_REPLICAS только внутри read_from(True) и вне
+    транзакций основной базы. Записи и миграции — только в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.READ_REPLICAS
+            and replica_reads.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return random.choice(settings.READ_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -55,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,6 +68,32 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'foodgram.urls'
 
+# Бюджеты запросов по ViewSet.action: при превышении числа SQL-запросов
+# или времени ответа в миллисекундах запрос пишется в лог
+REQUEST_BUDGETS = {
+    'default': {
+        'queries': int(os.getenv('REQUEST_BUDGET_QUERIES', default=20)),
+        'latency_ms': int(os.getenv('REQUEST_BUDGET_LATENCY', default=500)),
+    },
+    'RecipeViewSet.list': {'queries': 8, 'latency_ms': 300},
+    'RecipeViewSet.retrieve': {'queries': 8, 'latency_ms': 200},
+    'RecipeViewSet.feed': {'queries': 10, 'latency_ms': 300},
+    'RecipeViewSet.download_shopping_cart': {'queries': 3},
+    'RecipeViewSet.create': {'queries': 30, 'latency_ms': 1000},
+    'RecipeViewSet.partial_update': {'queries': 30, 'latency_ms': 1000},
+    'TagViewSet.list': {'queries': 1, 'latency_ms': 50},
+    'IngredientViewSet.list': {'queries': 1, 'latency_ms': 100},
+    'UserViewSet.subscriptions': {'queries': 6, 'latency_ms': 300},
+    'RecipeViewSet.export_recipes': {'latency_ms': None},
+    'RecipeViewSet.import_recipes': {'queries': None, 'latency_ms': None},
+}
+
+# wsgi или asgi; в режиме asgi часть API обслуживается асинхронными
+# обёртками из api.async_views
+SERVER_MODE = os.getenv('SERVER_MODE', default='wsgi')
+ASYNC_VIEWS = SERVER_MODE == 'asgi'
+ASYNC_VIEW_THREADS = int(os.getenv('ASYNC_VIEW_THREADS', default=16))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -91,15 +119,67 @@ WSGI_APPLICATION = 'foodgram.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'foodgram.postgresql',
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', default='localhost'),
-        'PORT': os.getenv('DB_PORT', default=5432)
+        'PORT': os.getenv('DB_PORT', default=5432),
+        # Соединение живёт CONN_MAX_AGE секунд и переиспользуется
+        # следующими запросами; 0 — закрывать после каждого запроса
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', default='True'
+        ) == 'True',
+        # Для pgbouncer в режиме transaction серверные курсоры
+        # нужно отключить
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', default='False'
+        ) == 'True',
     }
 }
 
+# Реплики для чтения: хост[:порт] через запятую
+READ_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', default='').split(',')), start=1
+):
+    host, _, port = replica.strip().partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.routers.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default=5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+# Кэш хранит поколения данных, закрепления за основной базой и токены,
+# поэтому при нескольких воркерах он должен быть общим (memcached)
+REQUIRE_SHARED_CACHE = os.getenv(
+    'REQUIRE_SHARED_CACHE', default='True'
+) == 'True'
+
+RECIPES_CACHE_ALIAS = 'default'
+RECIPES_CACHE_TIMEOUT = int(os.getenv('RECIPES_CACHE_TIMEOUT', default=300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -145,6 +225,22 @@ MEDIA_ROOT = Path(BASE_DIR) / 'media'
 
 AUTH_USER_MODEL = 'users.User'
 
+# Recipe images
+
+IMAGE_MAX_UPLOAD_SIZE = int(
+    os.getenv('IMAGE_MAX_UPLOAD_SIZE', default=10 * 1024 * 1024)
+)
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_MAX_SIZE = (2048, 2048)
+IMAGE_QUALITY = 85
+IMAGE_RENDITIONS_DIR = 'recipes/renditions'
+IMAGE_RENDITIONS = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'detail': (1200, 1200),
+}
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', default=2))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -152,9 +248,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 DATA_FILES_PATH = Path(__file__).resolve().parent.parent
 
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', default=300))
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', default=50))
+TAG_REGISTRY_TTL = int(os.getenv('TAG_REGISTRY_TTL', default=300))
+REFERENCE_CACHE_MAX_AGE = int(
+    os.getenv('REFERENCE_CACHE_MAX_AGE', default=300)
+)
+REFERENCE_CACHE_STALE = int(
+    os.getenv('REFERENCE_CACHE_STALE', default=24 * 60 * 60)
+)
+
+# Кэш токенов: общий кэш и LRU в памяти каждого процесса
+AUTH_TOKEN_CACHE = os.getenv('AUTH_TOKEN_CACHE', default='True') == 'True'
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', default=300))
+AUTH_TOKEN_LOCAL_TTL = int(os.getenv('AUTH_TOKEN_LOCAL_TTL', default=10))
+AUTH_TOKEN_LOCAL_SIZE = int(os.getenv('AUTH_TOKEN_LOCAL_SIZE', default=1024))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication'
+        if AUTH_TOKEN_CACHE
+        else 'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -163,6 +278,18 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6,
 }
 
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', default=100))
+
+TRENDING_WINDOW_DAYS = int(os.getenv('TRENDING_WINDOW_DAYS', default=7))
+TRENDING_HALF_LIFE_HOURS = float(
+    os.getenv('TRENDING_HALF_LIFE_HOURS', default=24)
+)
+TRENDING_FAVORITE_WEIGHT = 1.0
+TRENDING_CART_WEIGHT = 0.5
+
+FEED_FANOUT_THRESHOLD = int(os.getenv('FEED_FANOUT_THRESHOLD', default=5000))
+FEED_BACKFILL_SIZE = 50
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
@@ -0,0 +1,40 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from ..postgresql.base import DatabaseWrapper
+
+
+@skipUnless(
+    isinstance(connection, DatabaseWrapper),
+    'бэкенд foodgram.postgresql'
+)
+class HealthCheckTest(SimpleTestCase):
+    databases = {'default'}
+
+    def make_connection(self):
+        settings_dict = dict(
+            connection.settings_dict,
+            CONN_MAX_AGE=None,
+            CONN_HEALTH_CHECKS=True
+        )
+        wrapper = DatabaseWrapper(settings_dict, alias='health_check')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_fresh_connection(self):
+        wrapper = self.make_connection()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone(), (1,))
+        self.assertTrue(wrapper.health_check_done)
+
+    def test_reconnect_after_server_closed_connection(self):
+        wrapper = self.make_connection()
+        wrapper.ensure_connection()
+        wrapper.connection.close()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone(), (1,))
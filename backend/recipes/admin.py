@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.contrib.postgres.search import SearchQuery
 
-from .models import (Cart, Favourite, Follow, Ingredient, Recipe,
-                     RecipeIngredient, Tag)
+from .images import schedule_renditions
+from .models import (SEARCH_CONFIG, Cart, CartIngredient, Favourite, Follow,
+                     Ingredient, Recipe, RecipeIngredient, Tag,
+                     get_recipe_amounts)
 
 
 class ItemInline(admin.StackedInline):
@@ -27,16 +30,42 @@ class RecipeAdmin(admin.ModelAdmin):
     inlines = [ItemInline]
     list_display = (
         'id', 'author', 'name', 'text',
-        'cooking_time'
+        'cooking_time', 'favorites_count', 'carts_count'
     )
     search_fields = (
-        'name', 'author', 'tags'
+        'name', 'text'
     )
     list_filter = (
         'author', 'name', 'tags'
     )
     empty_value_display = '-empty-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        query = SearchQuery(
+            search_term,
+            config=SEARCH_CONFIG,
+            search_type='websearch'
+        )
+        return queryset.filter(search_vector=query), False
+
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            obj.images_ready = False
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            schedule_renditions(obj.image.name)
+
+    def save_related(self, request, form, formsets, change):
+        old_amounts = get_recipe_amounts(form.instance) if change else {}
+        super().save_related(request, form, formsets, change)
+        CartIngredient.objects.change_recipe(
+            form.instance,
+            old_amounts,
+            get_recipe_amounts(form.instance)
+        )
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
@@ -62,3 +91,8 @@ class FavouriteAdmin(admin.ModelAdmin):
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
+
+
+@admin.register(CartIngredient)
+class CartIngredientAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'ingredient', 'amount')
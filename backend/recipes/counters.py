@@ -0,0 +1,53 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from users.models import User
+
+from .models import Cart, Favourite, Follow, Recipe
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favourite, 'recipe'),
+    (Recipe, 'carts_count', Cart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def count_of(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на запись."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def change_counter(model, pk, counter, delta):
+    """Сдвигает счётчик на delta, не опуская его ниже нуля."""
+    value = F(counter) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    model.objects.filter(pk=pk).update(**{counter: value})
+
+
+def change_counters(instance, delta):
+    """Обновляет счётчики, которые зависят от добавленной или удалённой
+    записи instance."""
+    for model, counter, related_model, field in COUNTERS:
+        if isinstance(instance, related_model):
+            change_counter(
+                model, getattr(instance, f'{field}_id'), counter, delta
+            )
+
+
+def reconcile_counters():
+    """Исправляет разошедшиеся счётчики и возвращает число исправлений."""
+    fixed = {}
+    for model, counter, related_model, field in COUNTERS:
+        actual = count_of(related_model, field)
+        drifted = model.objects.annotate(actual=actual).exclude(
+            **{counter: F('actual')}
+        ).values('pk')
+        fixed[counter] = model.objects.filter(pk__in=drifted).update(
+            **{counter: actual}
+        )
+    return fixed
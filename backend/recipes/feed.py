@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db.models import Q
+
+from .models import FeedEntry, Follow, Recipe, User
+
+
+def is_fanned_out(followers_count):
+    """Рецепты авторов с большим числом подписчиков не раскладываются
+    по лентам при публикации, а подмешиваются при чтении."""
+    return followers_count <= settings.FEED_FANOUT_THRESHOLD
+
+
+def fan_out(recipes, batch_size=1000):
+    """Добавляет рецепты в ленты подписчиков их авторов."""
+    by_author = {}
+    for recipe in recipes:
+        by_author.setdefault(recipe.author_id, []).append(recipe)
+    authors = [
+        pk for pk, followers_count in User.objects.filter(
+            pk__in=by_author
+        ).values_list('pk', 'followers_count')
+        if is_fanned_out(followers_count)
+    ]
+    followers = Follow.objects.filter(author__in=authors).values_list(
+        'author', 'user'
+    ).order_by()
+    batch = []
+    for author_id, user_id in followers.iterator():
+        batch.extend(
+            FeedEntry(user_id=user_id, recipe=recipe, pub_date=recipe.pub_date)
+            for recipe in by_author[author_id]
+        )
+        if len(batch) >= batch_size:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill_feed(user, author):
+    """Добавляет в ленту последние рецепты автора после подписки."""
+    if not is_fanned_out(author.followers_count):
+        return
+    recipes = Recipe.objects.filter(author=author).order_by(
+        '-pub_date'
+    ).values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE]
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user=user, recipe_id=pk, pub_date=pub_date)
+            for pk, pub_date in recipes
+        ),
+        ignore_conflicts=True
+    )
+
+
+def remove_from_feed(user, author):
+    FeedEntry.objects.filter(user=user, recipe__author=author).delete()
+
+
+def after(queryset, position, date_field, pk_field):
+    if position is None:
+        return queryset
+    value, pk = position
+    return queryset.filter(
+        Q(**{f'{date_field}__lte': value}),
+        Q(**{f'{date_field}__lt': value}) | Q(**{f'{pk_field}__lt': pk})
+    )
+
+
+def get_feed_keys(user, limit, position=None):
+    """Пары (pub_date, id) рецептов ленты по убыванию, начиная после
+    position.
+
+    Собирается из записей ленты пользователя и рецептов авторов без
+    раскладки; из каждого источника читается не больше limit строк.
+    """
+    entries = after(
+        FeedEntry.objects.filter(user=user), position, 'pub_date', 'recipe_id'
+    ).order_by('-pub_date', '-recipe_id').values_list('pub_date', 'recipe_id')
+    keys = set(entries[:limit])
+    celebrities = Follow.objects.filter(
+        user=user,
+        author__followers_count__gt=settings.FEED_FANOUT_THRESHOLD
+    ).values('author')
+    if celebrities.exists():
+        recipes = after(
+            Recipe.objects.filter(author__in=celebrities),
+            position, 'pub_date', 'pk'
+        ).order_by('-pub_date', '-pk').values_list('pub_date', 'pk')
+        keys.update(recipes[:limit])
+    return sorted(keys, reverse=True)[:limit]
+
+
+def rebuild_feeds():
+    """Дополняет ленты всех подписчиков недостающими записями."""
+    follows = Follow.objects.select_related('user', 'author').order_by('pk')
+    for follow in follows.iterator():
+        backfill_feed(follow.user, follow.author)
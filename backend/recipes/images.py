@@ -0,0 +1,189 @@
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Recipe
+from .signals import renditions_built
+from .storage import recipe_image_storage, rendition_storage
+
+logger = logging.getLogger(__name__)
+
+RENDITION_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_FORMATS = ('jpeg', 'jpg', 'png', 'gif')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ImageError(ValueError):
+    """Картинка не прошла проверку; code — причина."""
+    messages = {
+        'too_large': 'Размер картинки не должен превышать {max_size} байт.',
+        'too_many_pixels': 'Картинка слишком большая.',
+        'invalid_type': 'Формат картинки не поддерживается.',
+        'invalid_file': 'Файл повреждён или не является картинкой.',
+    }
+
+    def __init__(self, code, **params):
+        self.code = code
+        self.params = params
+        super().__init__(self.messages[code].format(**params))
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_WORKERS,
+                    thread_name_prefix='renditions'
+                )
+    return _executor
+
+
+def flatten(image):
+    """Приводит картинку к RGB, подкладывая белый фон под прозрачность."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        image_format,
+        quality=settings.IMAGE_QUALITY,
+        optimize=True
+    )
+    return buffer.getvalue()
+
+
+def decode_image(base64_data):
+    """Декодирует картинку из base64 частями во временный файл,
+    проверяет размер и формат и перекодирует её в JPEG не больше
+    IMAGE_MAX_SIZE. Возвращает байты JPEG и SHA-256 исходных данных
+    или бросает ImageError."""
+    if ';base64,' in base64_data:
+        base64_data = base64_data.split(';base64,', 1)[1]
+    max_size = settings.IMAGE_MAX_UPLOAD_SIZE
+    if len(base64_data) * 3 // 4 > max_size:
+        raise ImageError('too_large', max_size=max_size)
+    digest = hashlib.sha256()
+    with SpooledTemporaryFile(max_size=BASE64_CHUNK_SIZE * 16) as file:
+        try:
+            for start in range(0, len(base64_data), BASE64_CHUNK_SIZE):
+                chunk = base64.b64decode(
+                    base64_data[start:start + BASE64_CHUNK_SIZE],
+                    validate=True
+                )
+                digest.update(chunk)
+                file.write(chunk)
+        except (TypeError, binascii.Error, ValueError):
+            raise ImageError('invalid_file')
+        file.seek(0)
+        try:
+            image = Image.open(file)
+            if image.format.lower() not in IMAGE_FORMATS:
+                raise ImageError('invalid_type')
+            width, height = image.size
+            if width * height > settings.IMAGE_MAX_PIXELS:
+                raise ImageError('too_many_pixels')
+            image = flatten(image)
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+            raise ImageError('invalid_file')
+        image.thumbnail(settings.IMAGE_MAX_SIZE, Image.LANCZOS)
+        return encode(image, 'JPEG'), digest.hexdigest()
+
+
+def get_rendition_name(name, rendition, extension):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return os.path.join(
+        settings.IMAGE_RENDITIONS_DIR, f'{stem}_{rendition}.{extension}'
+    )
+
+
+def get_rendition_names(name):
+    return {
+        rendition: {
+            extension: get_rendition_name(name, rendition, extension)
+            for extension in RENDITION_FORMATS
+        }
+        for rendition in settings.IMAGE_RENDITIONS
+    }
+
+
+def renditions_exist(name):
+    return all(
+        rendition_storage.exists(rendition_name)
+        for formats in get_rendition_names(name).values()
+        for rendition_name in formats.values()
+    )
+
+
+def mark_renditions_ready(name):
+    """Отмечает рецепты с картинкой name, чтобы API отдавал их превью."""
+    if Recipe.objects.filter(image=name, images_ready=False).update(
+        images_ready=True
+    ):
+        renditions_built.send(sender=Recipe, name=name)
+
+
+def build_renditions(name, overwrite=False):
+    if not overwrite and renditions_exist(name):
+        mark_renditions_ready(name)
+        return
+    names = get_rendition_names(name)
+    with recipe_image_storage.open(name) as file:
+        image = flatten(Image.open(file))
+    for rendition, size in settings.IMAGE_RENDITIONS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        for extension, image_format in RENDITION_FORMATS.items():
+            rendition_name = names[rendition][extension]
+            if not overwrite and rendition_storage.exists(rendition_name):
+                continue
+            rendition_storage.save(
+                rendition_name,
+                ContentFile(encode(resized, image_format))
+            )
+    mark_renditions_ready(name)
+
+
+def _build_renditions_logged(name):
+    try:
+        build_renditions(name)
+    except Exception:
+        logger.exception('Не удалось построить превью для %s', name)
+    finally:
+        # Поток пула живёт вне цикла запроса и сам закрывает соединения
+        close_old_connections()
+
+
+def schedule_renditions(name):
+    """Строит превью в пуле потоков после фиксации транзакции."""
+    if name:
+        transaction.on_commit(
+            lambda: get_executor().submit(_build_renditions_logged, name)
+        )
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.images import build_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Построение превью для картинок всех рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.IMAGE_WORKERS,
+            help='Количество потоков'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Перестроить уже существующие превью'
+        )
+
+    def handle(self, *args, **options):
+        names = Recipe.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).distinct().order_by()
+        built = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [
+                (name, executor.submit(
+                    build_renditions, name, overwrite=options['force']
+                ))
+                for name in names.iterator()
+            ]
+            for name, future in futures:
+                try:
+                    future.result()
+                    built += 1
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Готово: {built}, с ошибками: {failed}')
+        )
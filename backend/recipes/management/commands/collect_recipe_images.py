@@ -0,0 +1,78 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from recipes.models import Recipe
+from recipes.storage import recipe_image_storage
+
+
+class Command(BaseCommand):
+    help = 'Удаление картинок и превью, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество файлов, удаляемых за один проход'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Не трогать файлы моложе указанного числа секунд'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены'
+        )
+
+    def walk(self, storage, path):
+        directories, files = storage.listdir(path)
+        for file in files:
+            yield os.path.join(path, file)
+        for directory in directories:
+            yield from self.walk(storage, os.path.join(path, directory))
+
+    def is_referenced(self, name, images, stems):
+        if os.path.dirname(name) == settings.IMAGE_RENDITIONS_DIR:
+            stem = os.path.basename(name).rsplit('_', 1)[0]
+            return stem in stems
+        return name in images
+
+    def handle(self, *args, **options):
+        storage = recipe_image_storage
+        images = set(
+            Recipe.objects.exclude(image='').values_list(
+                'image', flat=True
+            ).iterator()
+        )
+        stems = {
+            os.path.splitext(os.path.basename(name))[0] for name in images
+        }
+        threshold = timezone.now() - timedelta(seconds=options['min_age'])
+        if not storage.exists('recipes'):
+            return
+        batch = []
+        deleted = 0
+        for name in self.walk(storage, 'recipes'):
+            if (self.is_referenced(name, images, stems)
+                    or storage.get_modified_time(name) > threshold):
+                continue
+            batch.append(name)
+            if len(batch) >= options['batch_size']:
+                deleted += self.delete(storage, batch, options['dry_run'])
+                batch = []
+        deleted += self.delete(storage, batch, options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(f'Удалено файлов: {deleted}'))
+
+    def delete(self, storage, names, dry_run):
+        for name in names:
+            if dry_run:
+                self.stdout.write(name)
+            else:
+                storage.delete(name)
+        return len(names)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from recipes.scores import compute_recipe_scores
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт рейтингов популярности и актуальности рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном запросе'
+        )
+
+    def handle(self, *args, **options):
+        trending = compute_recipe_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги пересчитаны, актуальных рецептов: {trending}'
+        ))
@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.transfer import export_recipes
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка рецептов в формате JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл для выгрузки, по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--images',
+            action='store_true',
+            help='Встроить картинки в base64'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Количество рецептов в одном запросе к базе'
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            self.export(sys.stdout, options)
+            return
+        with open(options['path'], 'w', encoding='utf-8') as file:
+            self.export(file, options)
+
+    def export(self, file, options):
+        started = time.monotonic()
+        count = 0
+        for line in export_recipes(
+            include_images=options['images'],
+            chunk_size=options['chunk_size']
+        ):
+            file.write(line)
+            count += 1
+            if count % options['chunk_size'] == 0:
+                self.report(count, started)
+        self.report(count, started)
+
+    def report(self, count, started):
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else 0
+        self.stderr.write(f'Выгружено рецептов: {count} ({rate:.0f}/с)')
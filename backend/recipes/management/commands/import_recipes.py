@@ -0,0 +1,79 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand
+from recipes.transfer import RecipeImporter
+
+
+class Command(BaseCommand):
+    help = 'Загрузка рецептов из JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл с рецептами или - для stdin'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество рецептов в одной транзакции'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков для картинок'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с номером последней загруженной строки, '
+                 'по умолчанию <path>.checkpoint'
+        )
+        parser.add_argument(
+            '--no-renditions',
+            action='store_true',
+            help='Не строить превью загруженных картинок'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        self.checkpoint = options['checkpoint']
+        if self.checkpoint is None and path != '-':
+            self.checkpoint = f'{path}.checkpoint'
+        start = self.read_checkpoint()
+        if start:
+            self.stdout.write(f'Продолжение со строки {start + 1}')
+        importer = RecipeImporter(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            build_images=not options['no_renditions'],
+            on_chunk=self.on_chunk
+        )
+        if path == '-':
+            stats = importer.run(sys.stdin, start=start)
+        else:
+            with open(path, encoding='utf-8') as file:
+                stats = importer.run(file, start=start)
+        for error in stats.errors:
+            self.stderr.write(f'Строка {error["line"]}: {error["error"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено: {stats.imported}, с ошибками: {stats.failed}'
+        ))
+
+    def read_checkpoint(self):
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return 0
+        with open(self.checkpoint) as file:
+            return int(file.read().strip() or 0)
+
+    def on_chunk(self, stats):
+        if self.checkpoint is not None:
+            temporary = f'{self.checkpoint}.tmp'
+            with open(temporary, 'w') as file:
+                file.write(str(stats.position))
+            os.replace(temporary, self.checkpoint)
+        self.stdout.write(
+            f'Строка {stats.position}: загружено {stats.imported}, '
+            f'ошибок {stats.failed} ({stats.rate:.0f} рецептов/с)'
+        )
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+import os
+import sys
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Ingredient
+
+CSV_HEADER = ('name', 'measurement_unit')
+JSON_READ_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    reader = csv.reader(file)
+    for number, row in enumerate(reader):
+        if not row:
+            continue
+        if number == 0 and tuple(row[:2]) == CSV_HEADER:
+            continue
+        yield row[0], row[1]
+
+
+def read_json(file):
+    """Читает по одному объекту из JSON-массива или JSON Lines."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n[,]':
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = file.read(JSON_READ_SIZE), 0
+            eof = not buffer
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = file.read(JSON_READ_SIZE)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        position = end
+        yield item['name'], item['measurement_unit']
+
+
+def detect_format(file, path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.json', '.jsonl'):
+        return 'json'
+    if extension == '.csv':
+        return 'csv'
+    first = file.peek(1)[:1] if hasattr(file, 'peek') else b''
+    return 'json' if first in (b'[', b'{') else 'csv'
+
+
+class Command(BaseCommand):
+    help = 'Загрузка ингредиентов из CSV или JSON без дубликатов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join(settings.DATA_FILES_PATH, 'ingredients.csv'),
+            help='Файл с ингредиентами или - для stdin'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('csv', 'json'),
+            help='Формат файла, по умолчанию определяется автоматически'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном INSERT'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path == '-':
+            source = nullcontext(sys.stdin.buffer)
+        else:
+            try:
+                source = open(path, 'rb')
+            except OSError as error:
+                raise CommandError(error)
+        with source as binary:
+            file_format = options['format'] or detect_format(binary, path)
+            file = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+            rows = read_json(file) if file_format == 'json' else read_csv(
+                file
+            )
+            before = Ingredient.objects.count()
+            try:
+                processed = self.load(rows, options['batch_size'])
+            except (KeyError, TypeError, ValueError, IndexError) as error:
+                raise CommandError(f'Некорректные данные: {error!r}')
+            file.detach()
+        added = Ingredient.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {processed}, добавлено: {added}'
+        ))
+
+    def load(self, rows, batch_size):
+        processed = 0
+        batch = {}
+        for name, measurement_unit in rows:
+            processed += 1
+            name, measurement_unit = name.strip(), measurement_unit.strip()
+            if not name:
+                continue
+            batch[(name, measurement_unit)] = None
+            if len(batch) >= batch_size:
+                self.save(batch)
+                batch = {}
+        self.save(batch)
+        return processed
+
+    def save(self, batch):
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in batch
+            ),
+            ignore_conflicts=True
+        )
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from recipes.models import CartIngredient
+
+
+class Command(BaseCommand):
+    help = 'Пересборка сводного списка покупок по корзинам пользователей'
+
+    def handle(self, *args, **options):
+        created = CartIngredient.objects.rebuild()
+        self.stdout.write(f'Строк в списках покупок: {created}')
@@ -0,0 +1,60 @@
+# Generated by Django 3.2 on 2026-10-18 05:19
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    CartIngredient = apps.get_model('recipes', 'CartIngredient')
+    groups = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep=Min('id'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+    for group in groups.iterator():
+        duplicates = list(Ingredient.objects.filter(
+            name=group['name'],
+            measurement_unit=group['measurement_unit']
+        ).exclude(id=group['keep']).values_list('id', flat=True))
+        RecipeIngredient.objects.filter(
+            ingredient__in=duplicates
+        ).update(ingredient=group['keep'])
+        for item in CartIngredient.objects.filter(
+            ingredient__in=duplicates
+        ):
+            kept, created = CartIngredient.objects.get_or_create(
+                user_id=item.user_id,
+                ingredient_id=group['keep'],
+                defaults={'amount': 0}
+            )
+            kept.amount += item.amount
+            kept.save(update_fields=['amount'])
+            item.delete()
+        Ingredient.objects.filter(id__in=duplicates).delete()
+    rows = RecipeIngredient.objects.values(
+        'recipe', 'ingredient'
+    ).annotate(keep=Min('id'), total=Count('id')).filter(
+        total__gt=1
+    ).order_by()
+    for row in rows.iterator():
+        items = RecipeIngredient.objects.filter(
+            recipe=row['recipe'], ingredient=row['ingredient']
+        )
+        amount = sum(item.amount for item in items)
+        items.filter(id=row['keep']).update(amount=amount)
+        items.exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_alter_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_auto_20261018_0526'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='recipescore',
+            name='score_popularity_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='recipescore',
+            name='score_trending_idx',
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-popularity', '-recipe'], name='score_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-trending', '-recipe'], name='score_trending_idx'),
+        ),
+    ]
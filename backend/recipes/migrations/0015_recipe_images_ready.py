@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_drop_duplicate_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='images_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Превью построены'),
+        ),
+    ]
@@ -1,9 +1,113 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinValueValidator, RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from users.models import CounterFieldsMixin
+
+from .storage import recipe_image_storage
 
 User = get_user_model()
 
+SEARCH_CONFIG = 'russian'
+
+
+class CartIngredientManager(models.Manager):
+    """Инкрементальное обновление сводного списка покупок."""
+
+    def apply_amounts(self, user_ids, amounts):
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items() if amount
+        }
+        if not user_ids or not amounts:
+            return
+        with transaction.atomic():
+            # INSERT ... ON CONFLICT DO NOTHING не падает на строке,
+            # созданной параллельным запросом, а дожидается его и
+            # пропускает её; сумма затем сдвигается одним UPDATE
+            self.bulk_create(
+                (
+                    self.model(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        amount=0
+                    )
+                    for user_id in user_ids
+                    for ingredient_id, amount in amounts.items()
+                    if amount > 0
+                ),
+                batch_size=1000,
+                ignore_conflicts=True
+            )
+            rows = self.filter(
+                user_id__in=user_ids,
+                ingredient_id__in=amounts
+            )
+            rows.update(amount=F('amount') + Case(
+                *(
+                    When(ingredient_id=ingredient_id, then=Value(amount))
+                    for ingredient_id, amount in amounts.items()
+                ),
+                output_field=models.IntegerField()
+            ))
+            rows.filter(amount__lte=0).delete()
+
+    def add_recipe(self, user_id, recipe_id):
+        self.apply_amounts([user_id], get_recipe_amounts(recipe_id))
+
+    def remove_recipe(self, user_id, recipe_id):
+        self.apply_amounts(
+            [user_id],
+            get_recipe_amounts(recipe_id, sign=-1)
+        )
+
+    def change_recipe(self, recipe, old_amounts, new_amounts):
+        amounts = {
+            ingredient_id: (new_amounts.get(ingredient_id, 0)
+                            - old_amounts.get(ingredient_id, 0))
+            for ingredient_id in {*old_amounts, *new_amounts}
+        }
+        user_ids = list(
+            Cart.objects.filter(recipe=recipe).values_list('user', flat=True)
+        )
+        self.apply_amounts(user_ids, amounts)
+
+    def rebuild(self, batch_size=1000):
+        """Пересобирает сводный список покупок по корзинам с нуля."""
+        totals = RecipeIngredient.objects.filter(
+            recipe__cart__isnull=False
+        ).values_list('recipe__cart__user', 'ingredient').annotate(
+            total=Sum('amount')
+        ).order_by()
+        with transaction.atomic():
+            self.all().delete()
+            batch = []
+            created = 0
+            for user_id, ingredient_id, total in totals.iterator():
+                batch.append(self.model(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    amount=total
+                ))
+                if len(batch) >= batch_size:
+                    self.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            self.bulk_create(batch)
+        return created + len(batch)
+
+
+def get_recipe_amounts(recipe, sign=1):
+    amounts = {}
+    for ingredient_id, amount in RecipeIngredient.objects.filter(
+        recipe=recipe
+    ).values_list('ingredient', 'amount'):
+        amounts[ingredient_id] = amounts.get(ingredient_id, 0) + sign * amount
+    return amounts
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -20,6 +124,12 @@ class Ingredient(models.Model):
         ordering = ['name']
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name}'
@@ -58,7 +168,28 @@ class Tag(models.Model):
         return f'{self.name}'
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+
+    def update_search_vector(self):
+        """Пересчитывает поисковый вектор по названию, описанию и
+        названиям ингредиентов."""
+        ingredient_names = RecipeIngredient.objects.filter(
+            recipe=OuterRef('pk')
+        ).values('recipe').annotate(
+            names=StringAgg('ingredient__name', delimiter=' ')
+        ).values('names')
+        return self.update(search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+            + SearchVector(
+                Subquery(ingredient_names),
+                weight='C',
+                config=SEARCH_CONFIG
+            )
+        ))
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -72,9 +203,15 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/',
+        storage=recipe_image_storage,
         blank=True,
         verbose_name='Картинка'
     )
+    images_ready = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Превью построены'
+    )
     text = models.TextField(
         verbose_name='Описание',
         help_text='Введите описание рецепта'
@@ -102,11 +239,44 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном'
+    )
+    carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок'
+    )
+
+    objects = RecipeQuerySet.as_manager()
+
+    counter_fields = ('favorites_count', 'carts_count')
 
     class Meta:
         ordering = ['name']
         verbose_name = 'Рецепт',
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx'
+            ),
+            models.Index(
+                fields=['pub_date', 'id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name}'
@@ -116,7 +286,8 @@ class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
-        related_name='recipe'
+        related_name='recipe',
+        db_index=False
     )
     ingredient = models.ForeignKey(
         Ingredient,
@@ -134,19 +305,32 @@ class RecipeIngredient(models.Model):
         )
     )
 
+    class Meta:
+        # Индекс по recipe покрывает выборку ингредиентов рецептов
+        # и заменяет обычный индекс внешнего ключа
+        indexes = [
+            models.Index(
+                fields=['recipe'],
+                include=['id', 'ingredient', 'amount'],
+                name='recipe_ingredient_cover_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='follower',
-        verbose_name='Подписчик'
+        verbose_name='Подписчик',
+        db_index=False
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='following',
-        verbose_name='Подписываемый'
+        verbose_name='Подписываемый',
+        db_index=False
     )
 
     class Meta:
@@ -158,6 +342,12 @@ class Follow(models.Model):
                 name='unique_follow'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        ]
 
 
 class Favourite(models.Model):
@@ -165,13 +355,20 @@ class Favourite(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='favorite',
-        verbose_name='Пользователь'
+        verbose_name='Пользователь',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         related_name='favorite',
-        verbose_name='Избранное'
+        verbose_name='Избранное',
+        db_index=False
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления'
     )
 
     class Meta:
@@ -183,6 +380,12 @@ class Favourite(models.Model):
                 name='unique_favourite'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'],
+                name='favourite_recipe_user_idx'
+            ),
+        ]
 
 
 class Cart(models.Model):
@@ -190,13 +393,20 @@ class Cart(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='cart',
-        verbose_name='Покупатель'
+        verbose_name='Покупатель',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         related_name='cart',
-        verbose_name='Рецепт в списке'
+        verbose_name='Рецепт в списке',
+        db_index=False
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления'
     )
 
     class Meta:
@@ -208,3 +418,112 @@ class Cart(models.Model):
                 name='unique_cart'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user'],
+                name='cart_recipe_user_idx'
+            ),
+        ]
+
+
+class RecipeScore(models.Model):
+    """Предрассчитанные рейтинги рецепта для сортировки ленты."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт'
+    )
+    popularity = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Популярность'
+    )
+    trending = models.FloatField(
+        default=0,
+        verbose_name='Актуальность'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата пересчёта'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                fields=['-popularity', '-recipe'],
+                name='score_popularity_idx'
+            ),
+            models.Index(
+                fields=['-trending', '-recipe'],
+                name='score_trending_idx'
+            ),
+        ]
+
+
+class FeedEntry(models.Model):
+    """Рецепт в ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик',
+        db_index=False
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx'
+            ),
+        ]
+
+
+class CartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='cart_ingredients',
+        verbose_name='Покупатель'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='cart_ingredients',
+        verbose_name='Ингредиент'
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество'
+    )
+
+    objects = CartIngredientManager()
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списке покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_cart_ingredient'
+            )
+        ]
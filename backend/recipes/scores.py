@@ -0,0 +1,78 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Cart, Favourite, Recipe, RecipeScore
+from .signals import scores_updated
+
+
+def get_activity(model, since):
+    """Количество добавлений рецептов по часам начиная с since."""
+    return model.objects.filter(created__gte=since).annotate(
+        hour=TruncHour('created')
+    ).values_list('recipe', 'hour').annotate(total=Count('pk')).order_by()
+
+
+def compute_trending(now):
+    """Сумма добавлений в избранное и покупки за окно с экспоненциальным
+    затуханием: вес события уменьшается вдвое каждые
+    TRENDING_HALF_LIFE_HOURS часов."""
+    since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    scores = defaultdict(float)
+    for model, weight in (
+        (Favourite, settings.TRENDING_FAVORITE_WEIGHT),
+        (Cart, settings.TRENDING_CART_WEIGHT),
+    ):
+        for recipe_id, hour, total in get_activity(model, since).iterator():
+            age = max((now - hour).total_seconds(), 0)
+            scores[recipe_id] += weight * total * 0.5 ** (age / half_life)
+    return scores
+
+
+def compute_recipe_scores(batch_size=1000):
+    """Пересчитывает таблицу RecipeScore, меняя только отличающиеся строки.
+
+    Возвращает количество рецептов с ненулевой актуальностью.
+    """
+    trending = compute_trending(timezone.now())
+    popularity = Subquery(
+        Recipe.objects.filter(pk=OuterRef('recipe')).values(
+            'favorites_count'
+        )[:1]
+    )
+    with transaction.atomic():
+        RecipeScore.objects.bulk_create(
+            (
+                RecipeScore(recipe_id=pk)
+                for pk in Recipe.objects.filter(
+                    score__isnull=True
+                ).values_list('pk', flat=True).iterator()
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+        drifted = RecipeScore.objects.annotate(actual=popularity).exclude(
+            popularity=F('actual')
+        ).values('pk')
+        RecipeScore.objects.filter(pk__in=drifted).update(
+            popularity=popularity
+        )
+        RecipeScore.objects.exclude(trending=0).exclude(
+            pk__in=list(trending)
+        ).update(trending=0)
+        RecipeScore.objects.bulk_update(
+            [
+                RecipeScore(recipe_id=pk, trending=score)
+                for pk, score in trending.items()
+            ],
+            ['trending'],
+            batch_size=batch_size
+        )
+    scores_updated.send(sender=RecipeScore)
+    return len(trending)
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import Signal, receiver
+
+from .counters import change_counters
+from .feed import fan_out
+from .models import (Cart, CartIngredient, Favourite, Follow, Ingredient,
+                     Recipe, RecipeScore)
+
+recipes_imported = Signal()
+scores_updated = Signal()
+renditions_built = Signal()
+
+
+@receiver(post_save, sender=Cart)
+def add_cart_ingredients(sender, instance, created, **kwargs):
+    if created:
+        CartIngredient.objects.add_recipe(
+            instance.user_id, instance.recipe_id
+        )
+
+
+@receiver(pre_save, sender=Cart)
+def move_cart_ingredients(sender, instance, **kwargs):
+    """Правка строки корзины, например в админке, переносит сумму
+    ингредиентов со старых пользователя и рецепта на новые."""
+    if instance.pk is None:
+        return
+    old = Cart.objects.filter(pk=instance.pk).values_list(
+        'user', 'recipe'
+    ).first()
+    if old is None or old == (instance.user_id, instance.recipe_id):
+        return
+    CartIngredient.objects.remove_recipe(*old)
+    CartIngredient.objects.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=Cart)
+def remove_cart_ingredients(sender, instance, **kwargs):
+    # pre_delete: при каскадном удалении рецепта его ингредиенты
+    # ещё на месте
+    CartIngredient.objects.remove_recipe(
+        instance.user_id, instance.recipe_id
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, **kwargs):
+    # После фиксации: ингредиенты нового рецепта сохраняются уже
+    # после самого рецепта, и вектор пересчитывается один раз
+    pk = instance.pk
+    transaction.on_commit(
+        lambda: Recipe.objects.filter(pk=pk).update_search_vector()
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_score(sender, instance, created, **kwargs):
+    if created:
+        RecipeScore.objects.create(recipe=instance)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created:
+        fan_out([instance])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search_vector(sender, instance, created,
+                                            **kwargs):
+    if not created:
+        Recipe.objects.filter(ingredients=instance).update_search_vector()
+
+
+@receiver(post_save, sender=Favourite)
+@receiver(post_save, sender=Cart)
+@receiver(post_save, sender=Follow)
+@receiver(post_save, sender=Recipe)
+def increment_counters(sender, instance, created, **kwargs):
+    if created:
+        change_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Favourite)
+@receiver(post_delete, sender=Cart)
+@receiver(post_delete, sender=Follow)
+@receiver(post_delete, sender=Recipe)
+def decrement_counters(sender, instance, **kwargs):
+    change_counters(instance, -1)
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class AtomicFileSystemStorage(FileSystemStorage):
+    """Записывает файл под временным именем и атомарно подменяет им
+    существующий файл с тем же именем."""
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        temporary_name = super()._save(
+            f'{name}.{uuid.uuid4().hex}.tmp', content
+        )
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
+
+
+@deconstructible
+class ContentAddressedStorage(AtomicFileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 их содержимого.
+
+    Одинаковые загрузки получают одно имя и записываются один раз,
+    поэтому файлы никогда не перезаписываются и могут кэшироваться
+    навсегда. Неиспользуемые файлы удаляет команда
+    collect_recipe_images.
+    """
+
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        )
+
+    def get_digest(self, name):
+        """SHA-256 содержимого, записанный в имени файла."""
+        return os.path.splitext(os.path.basename(name))[0]
+
+    def _save(self, name, content):
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            # collect_recipe_images не трогает свежие файлы: без нового
+            # mtime старый файл удалился бы до фиксации ссылающейся
+            # на него записи
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
+
+
+recipe_image_storage = ContentAddressedStorage()
+rendition_storage = AtomicFileSystemStorage()
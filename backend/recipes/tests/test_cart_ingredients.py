@@ -0,0 +1,87 @@
+from django.test import TestCase
+from users.models import User
+
+from ..models import Cart, CartIngredient, Ingredient, Recipe, RecipeIngredient
+
+
+class CartIngredientsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.com', username='reader', password='pass'
+        )
+        cls.salt, cls.flour = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Соль', 'Мука')
+        ]
+        cls.bread, cls.soup = [
+            Recipe.objects.create(
+                author=cls.author,
+                name=name,
+                text='Текст',
+                cooking_time=10,
+                image='recipes/image.jpg'
+            )
+            for name in ('Хлеб', 'Суп')
+        ]
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=cls.bread, ingredient=cls.flour,
+                             amount=500),
+            RecipeIngredient(recipe=cls.bread, ingredient=cls.salt,
+                             amount=5),
+            RecipeIngredient(recipe=cls.soup, ingredient=cls.salt,
+                             amount=10),
+        ])
+
+    def amounts(self):
+        return dict(CartIngredient.objects.filter(
+            user=self.reader
+        ).values_list('ingredient', 'amount'))
+
+    def test_cart_rows_update_aggregate(self):
+        Cart.objects.create(user=self.reader, recipe=self.bread)
+        cart = Cart.objects.create(user=self.reader, recipe=self.soup)
+        self.assertEqual(
+            self.amounts(), {self.flour.id: 500, self.salt.id: 15}
+        )
+        cart.recipe = self.bread
+        cart.user = self.author
+        cart.save()
+        self.assertEqual(
+            self.amounts(), {self.flour.id: 500, self.salt.id: 5}
+        )
+        Cart.objects.filter(user=self.reader).delete()
+        self.assertEqual(self.amounts(), {})
+
+    def test_existing_row_is_incremented(self):
+        CartIngredient.objects.create(
+            user=self.reader, ingredient=self.salt, amount=1
+        )
+        Cart.objects.create(user=self.reader, recipe=self.soup)
+        self.assertEqual(self.amounts(), {self.salt.id: 11})
+
+    def test_recipe_deletion(self):
+        Cart.objects.create(user=self.reader, recipe=self.bread)
+        Cart.objects.create(user=self.reader, recipe=self.soup)
+        self.bread.delete()
+        self.assertEqual(self.amounts(), {self.salt.id: 10})
+
+    def test_rebuild(self):
+        Cart.objects.create(user=self.reader, recipe=self.bread)
+        Cart.objects.create(user=self.author, recipe=self.soup)
+        expected = set(CartIngredient.objects.values_list(
+            'user', 'ingredient', 'amount'
+        ))
+        CartIngredient.objects.filter(user=self.author).delete()
+        CartIngredient.objects.update(amount=1)
+        self.assertEqual(CartIngredient.objects.rebuild(), 3)
+        self.assertEqual(
+            set(CartIngredient.objects.values_list(
+                'user', 'ingredient', 'amount'
+            )),
+            expected
+        )
@@ -0,0 +1,68 @@
+from django.test import TestCase
+from users.models import User
+
+from ..models import Cart, Favourite, Follow, Recipe
+
+
+class CountersTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.com', username='reader', password='pass'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/image.jpg'
+        )
+
+    def assert_counters(self, favorites, carts, recipes, followers):
+        self.recipe.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(
+            (
+                self.recipe.favorites_count,
+                self.recipe.carts_count,
+                self.author.recipes_count,
+                self.author.followers_count,
+            ),
+            (favorites, carts, recipes, followers)
+        )
+
+    def test_rows_created_outside_api_are_counted(self):
+        Favourite.objects.create(user=self.reader, recipe=self.recipe)
+        Cart.objects.create(user=self.reader, recipe=self.recipe)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assert_counters(1, 1, 1, 1)
+        Favourite.objects.all().delete()
+        Cart.objects.all().delete()
+        Follow.objects.all().delete()
+        self.assert_counters(0, 0, 1, 0)
+
+    def test_counters_do_not_go_below_zero(self):
+        Favourite.objects.create(user=self.reader, recipe=self.recipe)
+        Recipe.objects.update(favorites_count=0)
+        Favourite.objects.all().delete()
+        self.assert_counters(0, 0, 1, 0)
+
+    def test_full_save_keeps_counters(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        author = User.objects.get(pk=self.author.pk)
+        Favourite.objects.create(user=self.reader, recipe=self.recipe)
+        Cart.objects.create(user=self.reader, recipe=self.recipe)
+        Follow.objects.create(user=self.reader, author=self.author)
+        recipe.name = 'Новое название'
+        recipe.save()
+        author.set_password('new-pass')
+        author.save()
+        self.assert_counters(1, 1, 1, 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, 'Новое название')
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.check_password('new-pass'))
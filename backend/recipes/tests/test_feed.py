@@ -0,0 +1,48 @@
+from django.test import TestCase
+from django.utils import timezone
+from users.models import User
+
+from ..feed import get_feed_keys
+from ..models import FeedEntry, Follow, Recipe
+
+
+class FeedKeysTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.com', username='reader', password='pass'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        # Названия идут в обратном порядке к id, чтобы сортировка
+        # по названию вместо id сломала курсор
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт {9 - number}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/image.jpg'
+            )
+            for number in range(7)
+        ]
+        same_time = timezone.now()
+        Recipe.objects.update(pub_date=same_time)
+        FeedEntry.objects.update(pub_date=same_time)
+
+    def test_pages_with_equal_pub_date(self):
+        seen = []
+        position = None
+        while True:
+            keys = get_feed_keys(self.reader, 3, position)
+            if not keys:
+                break
+            seen.extend(pk for _, pk in keys)
+            position = keys[-1]
+        self.assertEqual(
+            seen,
+            sorted((recipe.pk for recipe in self.recipes), reverse=True)
+        )
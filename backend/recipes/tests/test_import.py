@@ -0,0 +1,126 @@
+import base64
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from ..images import ImageError
+from ..models import Tag
+from ..storage import recipe_image_storage
+from ..transfer import ImportStats, RecipeImporter
+
+
+def make_record(*tags):
+    return {
+        'tags': [
+            {'name': slug, 'color': color, 'slug': slug}
+            for slug, color in tags
+        ],
+    }
+
+
+class EnsureTagsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast')
+
+    def test_tag_with_taken_color_is_reported(self):
+        importer = RecipeImporter()
+        importer.tags = dict(Tag.objects.values_list('slug', 'pk'))
+        stats = ImportStats()
+        records = importer.ensure_tags(
+            [
+                (1, make_record(('breakfast', '#E26C2D'))),
+                (2, make_record(('dinner', '#49B64E'),
+                                ('brunch', '#E26C2D'))),
+                (3, make_record(('dinner', '#49B64E'))),
+            ],
+            stats
+        )
+        self.assertEqual([number for number, _ in records], [1, 3])
+        self.assertEqual(stats.failed, 1)
+        self.assertEqual(stats.errors[0]['line'], 2)
+        self.assertIn('brunch (#E26C2D)', stats.errors[0]['error'])
+        self.assertEqual(
+            set(Tag.objects.values_list('slug', flat=True)),
+            {'breakfast', 'dinner'}
+        )
+
+
+def make_line(**changes):
+    data = {
+        'author': 'author@example.com',
+        'name': 'Рецепт',
+        'text': 'Текст',
+        'cooking_time': 10,
+        'image': 'recipes/image.jpg',
+        'tags': [{'name': 'Обед', 'color': '#49B64E', 'slug': 'lunch'}],
+        'ingredients': [
+            {'name': 'Соль', 'measurement_unit': 'г', 'amount': 5}
+        ],
+    }
+    data.update(changes)
+    return json.dumps(data)
+
+
+class ParseTest(SimpleTestCase):
+
+    def test_invalid_values_fail_only_their_line(self):
+        lines = [
+            make_line(),
+            make_line(name='Р' * 201),
+            make_line(ingredients=[
+                {'name': 'Соль', 'measurement_unit': 'г' * 201, 'amount': 5}
+            ]),
+            make_line(tags=[
+                {'name': 'Обед', 'color': '#49B64E', 'slug': 's' * 201}
+            ]),
+            make_line(tags=[
+                {'name': 'Обед', 'color': 'зелёный', 'slug': 'lunch'}
+            ]),
+            make_line(image='recipes/' + 'i' * 100 + '.jpg'),
+            make_line(cooking_time=0),
+        ]
+        stats = ImportStats()
+        records = RecipeImporter().parse(enumerate(lines, start=1), stats)
+        self.assertEqual([number for number, _ in records], [1])
+        self.assertEqual(
+            [error['line'] for error in stats.errors], [2, 3, 4, 5, 6, 7]
+        )
+
+
+class LoadImageTest(SimpleTestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_image_is_reencoded(self):
+        buffer = BytesIO()
+        Image.new('RGBA', (4000, 10), 'red').save(buffer, 'PNG')
+        record = {
+            'image': 'recipes/photo.png',
+            'image_data': base64.b64encode(buffer.getvalue()).decode(),
+        }
+        name, ready = RecipeImporter(build_images=False).load_image(record)
+        self.assertTrue(name.endswith('.jpg'))
+        self.assertFalse(ready)
+        with recipe_image_storage.open(name) as file:
+            image = Image.open(file)
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.width, 2048)
+
+    def test_invalid_image(self):
+        record = {
+            'image': 'recipes/photo.png',
+            'image_data': base64.b64encode(b'not an image').decode(),
+        }
+        with self.assertRaises(ImageError):
+            RecipeImporter(build_images=False).load_image(record)
@@ -0,0 +1,101 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from users.models import User
+
+from ..models import (Cart, Favourite, FeedEntry, Follow, Recipe,
+                      RecipeIngredient, RecipeScore)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN для PostgreSQL')
+class IndexUsageTest(TestCase):
+    """Горячие запросы должны использовать свои индексы.
+
+    На тестовой базе таблицы почти пусты, поэтому последовательное
+    сканирование отключается: проверяется, что подходящий индекс есть
+    и планировщик может его выбрать.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.com', username='reader', password='pass'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/image.jpg'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assert_uses_index(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+
+    def test_recipe_list(self):
+        self.assert_uses_index(
+            Recipe.objects.order_by('pub_date', 'id')[:6],
+            'recipe_pub_date_id_idx'
+        )
+
+    def test_author_recipes(self):
+        self.assert_uses_index(
+            Recipe.objects.filter(author=self.author).order_by('-pub_date'),
+            'recipe_author_pub_date_idx'
+        )
+
+    def test_recipe_ingredients(self):
+        self.assert_uses_index(
+            RecipeIngredient.objects.filter(recipe__in=[self.recipe.id]),
+            'recipe_ingredient_cover_idx'
+        )
+
+    def test_recipe_favourites_and_cart(self):
+        self.assert_uses_index(
+            Favourite.objects.filter(recipe=self.recipe),
+            'favourite_recipe_user_idx'
+        )
+        self.assert_uses_index(
+            Cart.objects.filter(recipe=self.recipe),
+            'cart_recipe_user_idx'
+        )
+
+    def test_user_favourites_and_cart(self):
+        self.assert_uses_index(
+            Favourite.objects.filter(user=self.reader), 'unique_favourite'
+        )
+        self.assert_uses_index(
+            Cart.objects.filter(user=self.reader), 'unique_cart'
+        )
+
+    def test_follows(self):
+        self.assert_uses_index(
+            Follow.objects.filter(author=self.author),
+            'follow_author_user_idx'
+        )
+        self.assert_uses_index(
+            Follow.objects.filter(user=self.reader), 'unique_follow'
+        )
+
+    def test_feed(self):
+        self.assert_uses_index(
+            FeedEntry.objects.filter(user=self.reader)
+            .order_by('-pub_date', '-recipe_id')[:6],
+            'feed_user_pub_date_idx'
+        )
+
+    def test_popular(self):
+        self.assert_uses_index(
+            RecipeScore.objects.order_by('-popularity', '-recipe')[:6],
+            'score_popularity_idx'
+        )
@@ -0,0 +1,27 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from ..storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTest(SimpleTestCase):
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.storage = ContentAddressedStorage(location=location)
+
+    def test_same_content_is_saved_once_and_touched(self):
+        name = self.storage.save('recipes/a.jpg', ContentFile(b'image'))
+        path = self.storage.path(name)
+        old = time.time() - 24 * 60 * 60
+        os.utime(path, (old, old))
+        self.assertEqual(
+            self.storage.save('recipes/b.jpg', ContentFile(b'image')), name
+        )
+        self.assertGreater(os.path.getmtime(path), old + 60)
@@ -0,0 +1,413 @@
+import base64
+import binascii
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import F, Prefetch
+from django.utils.dateparse import parse_datetime
+from users.models import User
+
+from .feed import fan_out
+from .images import build_renditions, decode_image, renditions_exist
+from .models import Ingredient, Recipe, RecipeIngredient, RecipeScore, Tag
+from .signals import recipes_imported
+from .storage import recipe_image_storage
+
+
+def iter_recipe_chunks(queryset, chunk_size):
+    """Отдаёт рецепты пачками по возрастанию id, без OFFSET."""
+    queryset = queryset.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'recipe',
+            queryset=RecipeIngredient.objects.select_related('ingredient')
+        )
+    ).order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def dump_recipe(recipe, include_images=False):
+    record = {
+        'author': recipe.author.email,
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'pub_date': recipe.pub_date.isoformat(),
+        'tags': [
+            {'name': tag.name, 'color': tag.color, 'slug': tag.slug}
+            for tag in recipe.tags.all()
+        ],
+        'ingredients': [
+            {
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.recipe.all()
+        ],
+        'image': recipe.image.name,
+    }
+    if include_images and recipe.image:
+        with recipe.image.open('rb') as file:
+            record['image_data'] = base64.b64encode(file.read()).decode()
+    return record
+
+
+def export_recipes(queryset=None, include_images=False, chunk_size=500):
+    """Строки JSON Lines со всеми рецептами выборки."""
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    for chunk in iter_recipe_chunks(queryset, chunk_size):
+        for recipe in chunk:
+            yield json.dumps(
+                dump_recipe(recipe, include_images), ensure_ascii=False
+            ) + '\n'
+
+
+def clean_fields(model, data, fields):
+    for name in fields:
+        field = model._meta.get_field(name)
+        try:
+            data[name] = field.clean(data[name], None)
+        except ValidationError as error:
+            raise ValidationError([
+                f'{field.verbose_name}: {message}'
+                for message in error.messages
+            ])
+
+
+class ImportStats:
+    def __init__(self, position=0):
+        self.position = position
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.imported / elapsed if elapsed else 0
+
+    def add_error(self, line, message):
+        self.failed += 1
+        self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'position': self.position,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'rate': round(self.rate, 1),
+        }
+
+
+class RecipeImporter:
+    """Загрузка рецептов из JSON Lines пачками.
+
+    Строки читаются потоком, каждая пачка сохраняется через bulk_create
+    в отдельной транзакции. Картинки из image_data декодируются
+    и сохраняются в пуле потоков. После каждой пачки вызывается
+    on_chunk со статистикой: её position — номер последней обработанной
+    строки, с которого можно продолжить прерванный импорт.
+    """
+
+    def __init__(self, batch_size=500, workers=4, build_images=True,
+                 on_chunk=None):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.build_images = build_images
+        self.on_chunk = on_chunk
+        self.ingredients = None
+        self.tags = None
+
+    def run(self, lines, start=0):
+        stats = ImportStats(position=start)
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit
+            in Ingredient.objects.values_list(
+                'pk', 'name', 'measurement_unit'
+            )
+        }
+        self.tags = dict(Tag.objects.values_list('slug', 'pk'))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            chunk = []
+            for number, line in enumerate(lines, start=1):
+                if number <= start or not line.strip():
+                    continue
+                chunk.append((number, line))
+                if len(chunk) >= self.batch_size:
+                    self.import_chunk(chunk, executor, stats)
+                    chunk = []
+            if chunk:
+                self.import_chunk(chunk, executor, stats)
+        recipes_imported.send(sender=self.__class__, stats=stats)
+        return stats
+
+    def parse(self, chunk, stats):
+        records = []
+        for number, line in chunk:
+            try:
+                data = json.loads(line)
+                record = {
+                    'author': data['author'],
+                    'name': data['name'],
+                    'text': data['text'],
+                    'cooking_time': int(data['cooking_time']),
+                    'pub_date': parse_datetime(data.get('pub_date') or ''),
+                    'image': data.get('image') or '',
+                    'image_data': data.get('image_data'),
+                    'tags': [
+                        {
+                            'name': tag['name'],
+                            'color': tag['color'],
+                            'slug': tag['slug'],
+                        }
+                        for tag in data['tags']
+                    ],
+                    'ingredients': [
+                        {
+                            'name': item['name'],
+                            'measurement_unit': item['measurement_unit'],
+                            'amount': int(item['amount']),
+                        }
+                        for item in data['ingredients']
+                    ],
+                }
+                self.validate(record)
+            except KeyError as error:
+                stats.add_error(number, f'Не хватает поля {error}.')
+                continue
+            except ValidationError as error:
+                stats.add_error(
+                    number, f'Некорректная запись: {" ".join(error.messages)}'
+                )
+                continue
+            except (TypeError, ValueError) as error:
+                stats.add_error(number, f'Некорректная запись: {error}')
+                continue
+            records.append((number, record))
+        return records
+
+    def validate(self, record):
+        """Проверяет значения валидаторами полей моделей, чтобы
+        некорректная строка не прервала транзакцию всей пачки."""
+        clean_fields(Recipe, record, ('name', 'text', 'cooking_time'))
+        image_field = Recipe._meta.get_field('image')
+        if len(record['image']) > image_field.max_length:
+            raise ValidationError(
+                f'{image_field.verbose_name}: имя длиннее '
+                f'{image_field.max_length} символов.'
+            )
+        for tag in record['tags']:
+            clean_fields(Tag, tag, ('name', 'color', 'slug'))
+        for item in record['ingredients']:
+            clean_fields(Ingredient, item, ('name', 'measurement_unit'))
+            clean_fields(RecipeIngredient, item, ('amount',))
+
+    def resolve_authors(self, records, stats):
+        emails = {record['author'] for _, record in records}
+        authors = dict(
+            User.objects.filter(email__in=emails).values_list('email', 'pk')
+        )
+        resolved = []
+        for number, record in records:
+            if record['author'] not in authors:
+                stats.add_error(
+                    number, f'Автор {record["author"]} не найден.'
+                )
+                continue
+            record['author_id'] = authors[record['author']]
+            resolved.append((number, record))
+        return resolved
+
+    def ensure_tags(self, records, stats):
+        missing = {
+            tag['slug']: tag
+            for _, record in records
+            for tag in record['tags']
+            if tag['slug'] not in self.tags
+        }
+        if not missing:
+            return records
+        # Тэг с уже занятым цветом bulk_create молча пропускает,
+        # поэтому созданные тэги перечитываются по slug
+        Tag.objects.bulk_create(
+            (
+                Tag(name=tag['name'], color=tag['color'], slug=tag['slug'])
+                for tag in missing.values()
+            ),
+            ignore_conflicts=True
+        )
+        self.tags.update(
+            Tag.objects.filter(slug__in=missing).values_list('slug', 'pk')
+        )
+        resolved = []
+        for number, record in records:
+            conflicts = [
+                tag for tag in record['tags'] if tag['slug'] not in self.tags
+            ]
+            if conflicts:
+                stats.add_error(
+                    number,
+                    'Тэги не созданы, цвет уже занят: {}.'.format(', '.join(
+                        f'{tag["slug"]} ({tag["color"]})' for tag in conflicts
+                    ))
+                )
+                continue
+            resolved.append((number, record))
+        return resolved
+
+    def ensure_ingredients(self, records):
+        missing = {
+            (item['name'], item['measurement_unit'])
+            for _, record in records
+            for item in record['ingredients']
+        } - self.ingredients.keys()
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in missing
+            ),
+            ignore_conflicts=True
+        )
+        self.ingredients.update(
+            ((name, unit), pk) for pk, name, unit
+            in Ingredient.objects.filter(
+                name__in={name for name, _ in missing}
+            ).values_list('pk', 'name', 'measurement_unit')
+        )
+
+    def load_image(self, record):
+        """Сохраняет картинку из image_data и возвращает её имя
+        и признак готовности превью."""
+        data = record.pop('image_data', None)
+        if not data:
+            name = record['image']
+            return name, bool(name) and renditions_exist(name)
+        # Те же проверки и перекодирование в JPEG, что и при загрузке
+        # через API
+        content, _ = decode_image(data)
+        content = ContentFile(content)
+        stem = os.path.splitext(os.path.basename(record['image']))[0]
+        name = recipe_image_storage.save(
+            Recipe._meta.get_field('image').generate_filename(
+                None, f'{stem or "image"}.jpg'
+            ),
+            content
+        )
+        try:
+            if self.build_images:
+                build_renditions(name)
+                return name, True
+            return name, renditions_exist(name)
+        finally:
+            # build_renditions отмечает рецепты в базе из потока пула
+            connection.close()
+
+    def load_images(self, records, executor, stats):
+        futures = [
+            (number, record, executor.submit(self.load_image, record))
+            for number, record in records
+        ]
+        loaded = []
+        for number, record, future in futures:
+            try:
+                record['image'], record['images_ready'] = future.result()
+            except (OSError, binascii.Error, ValueError) as error:
+                stats.add_error(number, f'Ошибка картинки: {error}')
+                continue
+            loaded.append((number, record))
+        return loaded
+
+    def import_chunk(self, chunk, executor, stats):
+        records = self.resolve_authors(self.parse(chunk, stats), stats)
+        records = self.ensure_tags(records, stats)
+        records = self.load_images(records, executor, stats)
+        with transaction.atomic():
+            self.ensure_ingredients(records)
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    author_id=record['author_id'],
+                    name=record['name'],
+                    text=record['text'],
+                    cooking_time=record['cooking_time'],
+                    image=record['image'],
+                    images_ready=record['images_ready'],
+                )
+                for _, record in records
+            )
+            dated = []
+            for recipe, (_, record) in zip(recipes, records):
+                if record['pub_date'] is not None:
+                    recipe.pub_date = record['pub_date']
+                    dated.append(recipe)
+            Recipe.objects.bulk_update(
+                dated, ['pub_date'], batch_size=self.batch_size
+            )
+            RecipeIngredient.objects.bulk_create(
+                (
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient_id=ingredient_id,
+                        amount=amount
+                    )
+                    for recipe, (_, record) in zip(recipes, records)
+                    for ingredient_id, amount in self.sum_amounts(record)
+                ),
+                batch_size=self.batch_size
+            )
+            Recipe.tags.through.objects.bulk_create(
+                (
+                    Recipe.tags.through(
+                        recipe_id=recipe.pk,
+                        tag_id=self.tags[slug]
+                    )
+                    for recipe, (_, record) in zip(recipes, records)
+                    for slug in {tag['slug'] for tag in record['tags']}
+                ),
+                batch_size=self.batch_size
+            )
+            Recipe.objects.filter(
+                pk__in=[recipe.pk for recipe in recipes]
+            ).update_search_vector()
+            RecipeScore.objects.bulk_create(
+                (RecipeScore(recipe=recipe) for recipe in recipes),
+                batch_size=self.batch_size
+            )
+            fan_out(recipes)
+            authors = Counter(recipe.author_id for recipe in recipes)
+            for author_id, count in authors.items():
+                User.objects.filter(pk=author_id).update(
+                    recipes_count=F('recipes_count') + count
+                )
+        stats.imported += len(recipes)
+        stats.position = chunk[-1][0]
+        if self.on_chunk is not None:
+            self.on_chunk(stats)
+
+    def sum_amounts(self, record):
+        amounts = {}
+        for item in record['ingredients']:
+            ingredient_id = self.ingredients[
+                (item['name'], item['measurement_unit'])
+            ]
+            amounts[ingredient_id] = (
+                amounts.get(ingredient_id, 0) + item['amount']
+            )
+        return amounts.items()
@@ -10,7 +10,9 @@ class UserAdmin(admin.ModelAdmin):
         'email',
         'first_name',
         'last_name',
-        'password'
+        'password',
+        'recipes_count',
+        'followers_count'
     )
     list_editable = ('password', )
     search_fields = ('username', 'email')
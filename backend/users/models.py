@@ -7,7 +7,34 @@ class UserRole(models.TextChoices):
     USER = 'user', 'Пользователь'
 
 
-class User(AbstractUser):
+class CounterFieldsMixin:
+    """Не даёт полному сохранению записи затереть счётчики.
+
+    Счётчики меняются сигналами через F(), а сохранение ранее
+    загруженной записи записало бы их устаревшие значения. Поэтому
+    save() существующей записи без update_fields обновляет все поля,
+    кроме counter_fields.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and not self._state.adding
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(CounterFieldsMixin, AbstractUser):
 
     email = models.EmailField(
         max_length=254,
@@ -20,6 +47,18 @@ class User(AbstractUser):
         default=UserRole.USER,
         verbose_name='Роль'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
+
+    counter_fields = ('recipes_count', 'followers_count')
 
     @property
     def is_admin(self):